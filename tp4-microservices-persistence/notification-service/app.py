@@ -1,17 +1,37 @@
 from flask import Flask, request, jsonify
 from flask_cors import CORS
 import logging
+from logging_setup import configure_logging
 from datetime import datetime
 from services.notification_service import notification_service
 from models.notification import Notification
+import metrics
+import profiling
+import json_provider
+import admission
 
 app = Flask(__name__)
 CORS(app)
+metrics.init_app(app)
+profiling.init_app(app)
+json_provider.init_app(app)
+admission.init_app(app, {
+    'get_notification': 'read',
+    'get_user_notifications': 'read',
+    'create_booking_notification': 'create',
+    'create_payment_notification': 'create',
+})
 
 # Configuration du logging
-logging.basicConfig(level=logging.INFO)
+configure_logging()
 logger = logging.getLogger(__name__)
 
+def conditional_json(payload):
+    """Réponse JSON avec ETag : 304 sans corps si le client a déjà cette version"""
+    response = jsonify(payload)
+    response.add_etag(weak=True)
+    return response.make_conditional(request)
+
 @app.route('/', methods=['GET'])
 def health_check():
     return jsonify({
@@ -23,7 +43,8 @@ def health_check():
         'endpoints': {
             'notifications': '/api/notifications',
             'user_notifications': '/api/notifications/user/{user_id}',
-            'health': '/health'
+            'health': '/health',
+            'metrics': '/metrics'
         }
     })
 
@@ -33,14 +54,16 @@ def health():
         'status': 'OK',
         'service': 'notification-service',
         'timestamp': datetime.now().isoformat(),
-        'database': 'MongoDB'
+        'database': 'MongoDB',
+        'admission': app.extensions['admission'].stats()
     })
 
 @app.route('/api/notifications/booking', methods=['POST'])
 def create_booking_notification():
     try:
         data = request.get_json()
-        logger.info(f"📧 Creating booking notification: {data}")
+        logger.info("📧 Creating booking notification", extra={'reservation_id': data.get('reservation_id'), 'user_id': data.get('user_id')})
+        logger.debug("Booking notification payload: %s", data)
         
         notification = notification_service.create_booking_notification(data)
         
@@ -51,7 +74,7 @@ def create_booking_notification():
         }), 201
         
     except Exception as e:
-        logger.error(f"❌ Error creating booking notification: {e}")
+        logger.error("❌ Error creating booking notification: %s", e)
         return jsonify({
             'error': 'Failed to create notification',
             'message': str(e)
@@ -61,7 +84,8 @@ def create_booking_notification():
 def create_payment_notification():
     try:
         data = request.get_json()
-        logger.info(f"💳 Creating payment notification: {data}")
+        logger.info("💳 Creating payment notification", extra={'payment_id': data.get('payment_id'), 'user_id': data.get('user_id')})
+        logger.debug("Payment notification payload: %s", data)
         
         notification = notification_service.create_payment_notification(data)
         
@@ -72,7 +96,7 @@ def create_payment_notification():
         }), 201
         
     except Exception as e:
-        logger.error(f"❌ Error creating payment notification: {e}")
+        logger.error("❌ Error creating payment notification: %s", e)
         return jsonify({
             'error': 'Failed to create notification',
             'message': str(e)
@@ -85,10 +109,10 @@ def get_notification(notification_id):
         if not notification:
             return jsonify({'error': 'Notification not found'}), 404
         
-        return jsonify(notification)
+        return conditional_json(notification)
         
     except Exception as e:
-        logger.error(f"❌ Error getting notification {notification_id}: {e}")
+        logger.error("❌ Error getting notification %s: %s", notification_id, e)
         return jsonify({
             'error': 'Failed to get notification',
             'message': str(e)
@@ -99,14 +123,14 @@ def get_user_notifications(user_id):
     try:
         notifications = Notification.find_by_user(user_id)
         
-        return jsonify({
+        return conditional_json({
             'user_id': user_id,
             'count': len(notifications),
             'notifications': notifications
         })
         
     except Exception as e:
-        logger.error(f"❌ Error getting notifications for user {user_id}: {e}")
+        logger.error("❌ Error getting notifications for user %s: %s", user_id, e)
         return jsonify({
             'error': 'Failed to get user notifications',
             'message': str(e)
@@ -124,6 +148,6 @@ if __name__ == '__main__':
     import os
     port = int(os.environ.get('PORT', 5001))
     debug = os.environ.get('DEBUG', 'false').lower() == 'true'
-    logger.info(f"🚀 Starting Notification Service on port {port}")
-    logger.info(f"💾 Using MongoDB for storage")
+    logger.info("🚀 Starting Notification Service on port %s", port)
+    logger.info("💾 Using MongoDB for storage")
     app.run(host='0.0.0.0', port=port, debug=debug)
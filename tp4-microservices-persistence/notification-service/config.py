@@ -1,5 +1,8 @@
 import os
 from pymongo import MongoClient
+from resources import registry
+from metrics import MongoCommandTimer
+from profiling import MongoRoundTripListener
 
 # Configuration MongoDB
 MONGODB_URI = os.getenv('MONGODB_URI', 'mongodb://localhost:27017/')
@@ -9,10 +12,26 @@ MONGODB_DB = os.getenv('MONGODB_DB', 'notifications_db')
 RABBITMQ_HOST = os.getenv('RABBITMQ_HOST', 'localhost')
 RABBITMQ_PORT = int(os.getenv('RABBITMQ_PORT', '5672'))
 
-# Connexion MongoDB
-mongo_client = MongoClient(MONGODB_URI)
-db = mongo_client[MONGODB_DB]
+# Budget de connexions MongoDB réparti entre les workers gunicorn
+WEB_CONCURRENCY = int(os.getenv('WEB_CONCURRENCY', '4'))
+MONGO_CONNECTION_BUDGET = int(os.getenv('MONGO_CONNECTION_BUDGET', '100'))
+
+# Connexion MongoDB : créée paresseusement dans chaque worker (MongoClient n'est pas fork-safe)
+def _create_mongo_client():
+    return MongoClient(
+        MONGODB_URI,
+        maxPoolSize=max(1, MONGO_CONNECTION_BUDGET // max(1, WEB_CONCURRENCY)),
+        event_listeners=[MongoCommandTimer(), MongoRoundTripListener()]
+    )
+
+registry.register('mongo', _create_mongo_client, close=lambda c: c.close())
+registry.register('db', lambda: registry.get('mongo')[MONGODB_DB])
+registry.register('notifications', lambda: registry.get('db')['notifications'])
+registry.register('templates', lambda: registry.get('db')['templates'])
+
+mongo_client = registry.lazy('mongo')
+db = registry.lazy('db')
 
 # Collections
-notifications_collection = db['notifications']
-templates_collection = db['templates']
+notifications_collection = registry.lazy('notifications')
+templates_collection = registry.lazy('templates')
@@ -0,0 +1,60 @@
+"""
+Fournisseur JSON rapide pour Flask (orjson)
+
+orjson sérialise en bytes directement, plusieurs fois plus vite que le module
+json standard. Les conversions et l'ordre des clés restent ceux de Flask
+(dates au format HTTP, Decimal / UUID en chaîne, clés triées). Seule
+différence : les caractères non ASCII sont émis en UTF-8 au lieu d'échappements
+\\uXXXX ; le JSON décodé par les clients est identique.
+Sans orjson installé, ou avec JSON_PROVIDER=default, Flask garde son
+fournisseur par défaut.
+"""
+
+import dataclasses
+import decimal
+import os
+import uuid
+from datetime import date
+from flask.json.provider import JSONProvider
+from werkzeug.http import http_date
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - dépendance optionnelle
+    orjson = None
+
+
+def _default(o):
+    if isinstance(o, date):
+        return http_date(o)
+    if isinstance(o, (decimal.Decimal, uuid.UUID)):
+        return str(o)
+    if dataclasses.is_dataclass(o):
+        return dataclasses.asdict(o)
+    if hasattr(o, '__html__'):
+        return str(o.__html__())
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+
+class OrjsonProvider(JSONProvider):
+    mimetype = 'application/json'
+
+    # Les dates passent par _default (format HTTP, comme Flask) au lieu d'ISO 8601 ;
+    # clés triées comme le fournisseur par défaut de Flask (sort_keys)
+    options = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS | orjson.OPT_SORT_KEYS if orjson else 0
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=_default, option=self.options).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        body = orjson.dumps(obj, default=_default, option=self.options | orjson.OPT_APPEND_NEWLINE)
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+
+def init_app(app):
+    if orjson is not None and os.getenv('JSON_PROVIDER', 'orjson') == 'orjson':
+        app.json = OrjsonProvider(app)
@@ -0,0 +1,119 @@
+"""
+Journalisation non bloquante et structurée
+
+Le thread de requête ne fait qu'empiler l'enregistrement dans une file
+(QueueHandler) ; le formatage et l'écriture sur stdout se font dans le
+thread du QueueListener. Les messages utilisent le formatage paresseux
+(logger.info("... %s", valeur)) et les champs structurés passent par extra=.
+
+Variables d'environnement :
+- LOG_LEVEL      : niveau racine (INFO par défaut)
+- LOG_QUEUE_SIZE : taille de la file ; au-delà, les messages sont abandonnés
+                   plutôt que de bloquer la requête
+- LOG_SAMPLING   : échantillonnage par logger des messages < WARNING,
+                   ex. "services.payment_service=0.1,app=0.5"
+"""
+
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+import sys
+from logging.handlers import QueueHandler, QueueListener
+
+_RESERVED = set(logging.LogRecord('', 0, '', 0, '', (), None).__dict__) | {'message', 'asctime', 'taskName'}
+
+_listener = None
+
+
+class KeyValueFormatter(logging.Formatter):
+    """Une ligne par enregistrement : ts=... level=... logger=... msg="..." clé=valeur"""
+
+    def format(self, record):
+        fields = {
+            'ts': self.formatTime(record, '%Y-%m-%dT%H:%M:%S'),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED and not key.startswith('_'):
+                fields[key] = value
+
+        line = ' '.join(f"{key}={_quote(value)}" for key, value in fields.items())
+        if record.exc_info:
+            line += '\n' + self.formatException(record.exc_info)
+        return line
+
+
+def _quote(value):
+    text = value if isinstance(value, str) else str(value)
+    if not text or any(c in text for c in ' ="\n'):
+        return json.dumps(text, ensure_ascii=False)
+    return text
+
+
+class SamplingFilter(logging.Filter):
+    """Ne garde qu'une fraction des messages < WARNING des loggers configurés"""
+
+    def __init__(self, rates):
+        super().__init__()
+        # Le préfixe le plus long l'emporte (services.payment_service avant services)
+        self.rates = sorted(rates.items(), key=lambda item: len(item[0]), reverse=True)
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+        for prefix, rate in self.rates:
+            if record.name == prefix or record.name.startswith(prefix + '.'):
+                return random.random() < rate
+        return True
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    dropped = 0
+
+    def prepare(self, record):
+        # Formatage différé au thread du listener : rien à préparer ici
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def parse_sampling(spec):
+    rates = {}
+    for item in filter(None, (part.strip() for part in spec.split(','))):
+        name, _, rate = item.partition('=')
+        rates[name.strip()] = float(rate)
+    return rates
+
+
+def configure_logging(level=None):
+    """Installe QueueHandler + QueueListener sur le logger racine (idempotent)"""
+    global _listener
+    if _listener is not None:
+        return _listener
+
+    log_queue = queue.Queue(maxsize=int(os.getenv('LOG_QUEUE_SIZE', '10000')))
+    handler = NonBlockingQueueHandler(log_queue)
+    sampling = parse_sampling(os.getenv('LOG_SAMPLING', ''))
+    if sampling:
+        handler.addFilter(SamplingFilter(sampling))
+
+    stream = logging.StreamHandler(sys.stdout)
+    stream.setFormatter(KeyValueFormatter())
+
+    root = logging.getLogger()
+    root.handlers = [handler]
+    root.setLevel(level or os.getenv('LOG_LEVEL', 'INFO').upper())
+
+    _listener = QueueListener(log_queue, stream, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
+    return _listener
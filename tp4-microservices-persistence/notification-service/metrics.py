@@ -0,0 +1,84 @@
+"""
+Métriques Prometheus du Service Notifications
+
+Exposées sur /metrics au format texte Prometheus. Sous gunicorn, chaque
+worker écrit ses valeurs dans PROMETHEUS_MULTIPROC_DIR et /metrics agrège
+tous les workers : le pod rapporte des chiffres globaux, quel que soit le
+worker qui répond au scrape.
+"""
+
+import os
+import time
+from flask import Response, g, request
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess
+)
+from pymongo import monitoring
+
+REQUEST_LATENCY = Histogram(
+    'http_request_duration_seconds', 'Latence des requêtes HTTP',
+    ['method', 'route', 'status']
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    'http_requests_in_flight', 'Requêtes HTTP en cours',
+    ['route'], multiprocess_mode='livesum'
+)
+ADMISSION_SHED = Counter(
+    'http_requests_shed_total', 'Requêtes refusées par le contrôle d\'admission (503)',
+    ['route_class']
+)
+
+MONGO_OPERATION_LATENCY = Histogram(
+    'mongo_operation_duration_seconds', 'Durée des commandes MongoDB',
+    ['command', 'status']
+)
+NOTIFICATION_SEND_QUEUE_DEPTH = Gauge(
+    'notification_send_queue_depth', 'Notifications en attente d\'envoi',
+    multiprocess_mode='livesum'
+)
+
+
+class MongoCommandTimer(monitoring.CommandListener):
+    """Chronomètre chaque commande MongoDB (find, insert, update...)"""
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        MONGO_OPERATION_LATENCY.labels(event.command_name, 'success').observe(event.duration_micros / 1e6)
+
+    def failed(self, event):
+        MONGO_OPERATION_LATENCY.labels(event.command_name, 'failure').observe(event.duration_micros / 1e6)
+
+
+def init_app(app):
+    @app.before_request
+    def start_timer():
+        g.metrics_start = time.perf_counter()
+        g.metrics_route = request.url_rule.rule if request.url_rule else 'unmatched'
+        REQUESTS_IN_FLIGHT.labels(g.metrics_route).inc()
+
+    @app.after_request
+    def observe_latency(response):
+        if 'metrics_start' in g:
+            REQUEST_LATENCY.labels(request.method, g.metrics_route, response.status_code).observe(
+                time.perf_counter() - g.metrics_start
+            )
+        return response
+
+    @app.teardown_request
+    def end_request(exc):
+        if 'metrics_route' in g:
+            REQUESTS_IN_FLIGHT.labels(g.metrics_route).dec()
+
+    @app.route('/metrics', methods=['GET'])
+    def metrics():
+        return Response(render_latest(), mimetype=CONTENT_TYPE_LATEST)
+
+
+def render_latest():
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry)
+    return generate_latest()
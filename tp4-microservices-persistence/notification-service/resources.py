@@ -0,0 +1,81 @@
+"""
+Registre de ressources par processus (fork-safe)
+
+Sous gunicorn (modèle pre-fork), un client créé à l'import est partagé entre
+le maître et tous les workers : sockets communes, pools dupliqués. Ici chaque
+ressource est créée paresseusement au premier usage, dans le processus qui
+l'utilise ; après un fork, les instances héritées sont abandonnées (sans
+fermer les sockets du parent) et recréées dans l'enfant.
+"""
+
+import os
+import threading
+
+
+class ResourceRegistry:
+    def __init__(self):
+        self._factories = {}
+        self._instances = {}
+        self._pid = os.getpid()
+        self._lock = threading.RLock()
+
+    def register(self, name, factory, after_fork=None, close=None):
+        """
+        factory()            : crée la ressource
+        after_fork(instance) : libère l'instance héritée sans toucher aux sockets du parent
+        close(instance)      : ferme proprement l'instance (arrêt du processus)
+        """
+        self._factories[name] = (factory, after_fork, close)
+
+    def get(self, name):
+        self._check_fork()
+        instance = self._instances.get(name)
+        if instance is None:
+            with self._lock:
+                instance = self._instances.get(name)
+                if instance is None:
+                    instance = self._factories[name][0]()
+                    self._instances[name] = instance
+        return instance
+
+    def lazy(self, name):
+        return LazyResource(self, name)
+
+    def reset(self):
+        """Ferme toutes les ressources du processus courant"""
+        self._check_fork()
+        with self._lock:
+            for name, instance in self._instances.items():
+                close = self._factories[name][2]
+                if close:
+                    close(instance)
+            self._instances = {}
+
+    def _check_fork(self):
+        if os.getpid() == self._pid:
+            return
+        # Processus enfant : les instances appartiennent au parent
+        for name, instance in self._instances.items():
+            after_fork = self._factories[name][1]
+            if after_fork:
+                after_fork(instance)
+        self._instances = {}
+        self._lock = threading.RLock()
+        self._pid = os.getpid()
+
+
+class LazyResource:
+    """Proxy qui résout la ressource du processus courant à chaque accès"""
+
+    def __init__(self, registry, name):
+        self._registry = registry
+        self._name = name
+
+    def __getattr__(self, attr):
+        return getattr(self._registry.get(self._name), attr)
+
+    def __repr__(self):
+        return f"<LazyResource {self._name}>"
+
+
+registry = ResourceRegistry()
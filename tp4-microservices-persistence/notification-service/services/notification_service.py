@@ -1,5 +1,6 @@
 from models.notification import Notification
 from config import templates_collection
+from metrics import NOTIFICATION_SEND_QUEUE_DEPTH
 import logging
 
 logger = logging.getLogger(__name__)
@@ -24,7 +25,7 @@ class NotificationService:
             }
             
             notification.save()
-            logger.info(f"✅ Booking notification created: {notification.id}")
+            logger.info("✅ Booking notification created: %s", notification.id)
             
             # Simuler l'envoi (dans un vrai système, cela serait asynchrone)
             self._send_notification(notification)
@@ -32,7 +33,7 @@ class NotificationService:
             return notification
             
         except Exception as e:
-            logger.error(f"❌ Error creating booking notification: {e}")
+            logger.error("❌ Error creating booking notification: %s", e)
             raise e
     
     def create_payment_notification(self, payment_data):
@@ -53,14 +54,14 @@ class NotificationService:
             }
             
             notification.save()
-            logger.info(f"✅ Payment notification created: {notification.id}")
+            logger.info("✅ Payment notification created: %s", notification.id)
             
             self._send_notification(notification)
             
             return notification
             
         except Exception as e:
-            logger.error(f"❌ Error creating payment notification: {e}")
+            logger.error("❌ Error creating payment notification: %s", e)
             raise e
     
     def _render_booking_template(self, data):
@@ -90,10 +91,11 @@ class NotificationService:
     
     def _send_notification(self, notification):
         """Simule l'envoi de notification (email, SMS, etc.)"""
+        NOTIFICATION_SEND_QUEUE_DEPTH.inc()
         try:
             # Dans un vrai système, on utiliserait un service d'email (SendGrid, AWS SES, etc.)
-            logger.info(f"📧 Sending {notification.channel} notification to user {notification.user_id}")
-            logger.info(f"   Subject: {notification.subject}")
+            logger.info("📧 Sending %s notification to user %s", notification.channel, notification.user_id)
+            logger.info("   Subject: %s", notification.subject)
             
             # Simuler un délai d'envoi
             import time
@@ -101,10 +103,12 @@ class NotificationService:
             
             # Marquer comme envoyé
             Notification.mark_as_sent(notification.id)
-            logger.info(f"✅ Notification {notification.id} sent successfully")
+            logger.info("✅ Notification %s sent successfully", notification.id)
             
         except Exception as e:
-            logger.error(f"❌ Failed to send notification {notification.id}: {e}")
+            logger.error("❌ Failed to send notification %s: %s", notification.id, e)
             raise e
+        finally:
+            NOTIFICATION_SEND_QUEUE_DEPTH.dec()
 
 notification_service = NotificationService()
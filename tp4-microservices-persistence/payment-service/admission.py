@@ -0,0 +1,130 @@
+"""
+Contrôle d'admission et délestage
+
+Quand PostgreSQL ralentit, les requêtes s'accumulent dans les workers jusqu'au
+timeout des clients HTTP de la saga, qui réessaient et amplifient la charge.
+Ici chaque processus borne ses requêtes en cours et refuse vite le surplus
+(503 + Retry-After) plutôt que de le laisser attendre indéfiniment.
+
+Chaque route appartient à une classe, par priorité décroissante :
+- compensate : compensations et transitions de statut de la saga
+- read       : lectures (polling de statut)
+- create     : nouvelles créations, limitées à une part des places
+               (ADMISSION_CREATE_SHARE) et délestées en premier
+
+Une requête sans place libre attend au plus le délai de sa classe
+(ADMISSION_DEADLINE_<CLASSE>_MS) et ne double jamais une classe plus
+prioritaire en attente.
+
+Le contrôle ne voit que les requêtes qui ont obtenu un thread gunicorn : les
+workers ont donc bien plus de threads que ADMISSION_MAX_IN_FLIGHT (voir
+gunicorn.conf.py), sinon le surplus attend dans la file de gunicorn sans
+jamais être délesté.
+"""
+
+import math
+import os
+import threading
+import time
+from flask import g, jsonify, request
+from metrics import ADMISSION_SHED
+
+PRIORITIES = {'compensate': 0, 'read': 1, 'create': 2}
+
+ADMISSION_MAX_IN_FLIGHT = int(os.getenv('ADMISSION_MAX_IN_FLIGHT', '8'))
+ADMISSION_CREATE_SHARE = float(os.getenv('ADMISSION_CREATE_SHARE', '0.5'))
+ADMISSION_RETRY_AFTER = int(os.getenv('ADMISSION_RETRY_AFTER', '1'))
+ADMISSION_DEADLINES_MS = {
+    'compensate': int(os.getenv('ADMISSION_DEADLINE_COMPENSATE_MS', '2000')),
+    'read': int(os.getenv('ADMISSION_DEADLINE_READ_MS', '500')),
+    'create': int(os.getenv('ADMISSION_DEADLINE_CREATE_MS', '100')),
+}
+
+
+class AdmissionController:
+    def __init__(self, max_in_flight=ADMISSION_MAX_IN_FLIGHT, create_share=ADMISSION_CREATE_SHARE,
+                 deadlines_ms=None):
+        self.max_in_flight = max_in_flight
+        self.limits = {
+            'compensate': max_in_flight,
+            'read': max_in_flight,
+            'create': max(1, math.ceil(max_in_flight * create_share)),
+        }
+        self.deadlines = {cls: ms / 1000 for cls, ms in (deadlines_ms or ADMISSION_DEADLINES_MS).items()}
+        self.in_flight = 0
+        self.waiting = {cls: 0 for cls in PRIORITIES}
+        self.shed = {cls: 0 for cls in PRIORITIES}
+        self._cond = threading.Condition()
+
+    def _can_enter(self, route_class):
+        if self.in_flight >= self.limits[route_class]:
+            return False
+        priority = PRIORITIES[route_class]
+        return not any(self.waiting[cls] for cls, p in PRIORITIES.items() if p < priority)
+
+    def acquire(self, route_class):
+        """Réserve une place ; False si aucune ne se libère avant le délai de la classe"""
+        deadline = time.monotonic() + self.deadlines[route_class]
+        with self._cond:
+            if self._can_enter(route_class):
+                self.in_flight += 1
+                return True
+
+            self.waiting[route_class] += 1
+            try:
+                while not self._can_enter(route_class):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.shed[route_class] += 1
+                        return False
+                    self._cond.wait(remaining)
+                self.in_flight += 1
+                return True
+            finally:
+                self.waiting[route_class] -= 1
+                # Une classe prioritaire qui abandonne peut débloquer les autres
+                self._cond.notify_all()
+
+    def release(self):
+        with self._cond:
+            self.in_flight -= 1
+            self._cond.notify_all()
+
+    def stats(self):
+        with self._cond:
+            return {
+                'in_flight': self.in_flight,
+                'limits': dict(self.limits),
+                'waiting': dict(self.waiting),
+                'shed': dict(self.shed),
+            }
+
+
+def init_app(app, route_classes, controller=None):
+    """route_classes : nom d'endpoint Flask -> classe ; les autres routes ne sont pas limitées"""
+    controller = controller or AdmissionController()
+    app.extensions['admission'] = controller
+
+    @app.before_request
+    def admit():
+        route_class = route_classes.get(request.endpoint)
+        if route_class is None:
+            return None
+        if not controller.acquire(route_class):
+            ADMISSION_SHED.labels(route_class).inc()
+            response = jsonify({
+                'error': 'Service overloaded',
+                'message': f'Too many in-flight requests, retry in {ADMISSION_RETRY_AFTER}s'
+            })
+            response.status_code = 503
+            response.headers['Retry-After'] = str(ADMISSION_RETRY_AFTER)
+            return response
+        g.admitted = True
+        return None
+
+    @app.teardown_request
+    def release(exc):
+        if g.pop('admitted', False):
+            controller.release()
+
+    return controller
@@ -2,20 +2,48 @@ from flask import Flask, request, jsonify
 from flask_cors import CORS
 import os
 import logging
+from logging_setup import configure_logging
+import threading
 from datetime import datetime
-from config import engine, Base
+from config import cache_manager
+import metrics
+import profiling
+import json_provider
+import admission
 from services.payment_service import payment_service
 from compensations.payment_compensation import compensation_service
+from services.cache_warmup_service import cache_warmup_service
+from services.cache_consistency_service import cache_consistency_service
 
 app = Flask(__name__)
 CORS(app)
+metrics.init_app(app)
+profiling.init_app(app)
+json_provider.init_app(app)
+admission.init_app(app, {
+    'compensate_payment': 'compensate',
+    'update_payment_status': 'compensate',  # transitions de statut pilotées par la saga
+    'get_payment': 'read',
+    'create_payment': 'create',
+})
 
 # Configuration du logging
-logging.basicConfig(level=logging.INFO)
+configure_logging()
 logger = logging.getLogger(__name__)
 
-# Créer les tables
-Base.metadata.create_all(bind=engine)
+# Préchauffage du cache en arrière-plan (ne bloque pas le démarrage) ;
+# un verrou Redis garantit qu'un seul worker l'exécute
+if os.environ.get('CACHE_WARMUP_ON_BOOT', 'false').lower() == 'true':
+    threading.Thread(
+        target=cache_warmup_service.warm_up_once,
+        kwargs={'lock_ttl': int(os.environ.get('CACHE_WARMUP_LOCK_TTL', '600'))},
+        name='cache-warmup', daemon=True
+    ).start()
+
+# Scan périodique de cohérence cache / base (0 = désactivé)
+cache_scan_interval = int(os.environ.get('CACHE_SCAN_INTERVAL_SECONDS', '0'))
+if cache_scan_interval > 0:
+    cache_consistency_service.start_background(cache_scan_interval)
 
 @app.route('/', methods=['GET'])
 def health_check():
@@ -28,7 +56,8 @@ def health_check():
         'endpoints': {
             'payments': '/api/payments',
             'compensations': '/api/payments/:id/compensate',
-            'health': '/health'
+            'health': '/health',
+            'metrics': '/metrics'
         }
     })
 
@@ -38,14 +67,18 @@ def health():
         'status': 'OK',
         'service': 'payment-service',
         'timestamp': datetime.now().isoformat(),
-        'database': 'PostgreSQL + Redis'
+        'database': 'PostgreSQL + Redis',
+        'cache_circuit': cache_manager.metrics(),
+        'cache_consistency': cache_consistency_service.latest_report(),
+        'admission': app.extensions['admission'].stats()
     })
 
 @app.route('/api/payments', methods=['POST'])
 def create_payment():
     try:
         data = request.get_json()
-        logger.info(f"💳 Creating payment: {data}")
+        logger.info("💳 Creating payment", extra={'reservation_id': data.get('reservation_id'), 'user_id': data.get('user_id')})
+        logger.debug("Payment payload: %s", data)
         
         # Validation basique
         required_fields = ['reservation_id', 'user_id', 'amount', 'payment_method']
@@ -62,7 +95,7 @@ def create_payment():
         }), 201
         
     except Exception as e:
-        logger.error(f"❌ Error creating payment: {e}")
+        logger.error("❌ Error creating payment: %s", e)
         return jsonify({
             'error': 'Failed to create payment',
             'message': str(e)
@@ -71,15 +104,19 @@ def create_payment():
 @app.route('/api/payments/<int:payment_id>', methods=['GET'])
 def get_payment(payment_id):
     try:
-        logger.info(f"🔍 Getting payment {payment_id}")
-        payment = payment_service.get_payment_by_id(payment_id)
-        if not payment:
+        logger.info("🔍 Getting payment %s", payment_id)
+        payment_json = payment_service.get_payment_json(payment_id)
+        if not payment_json:
             return jsonify({'error': 'Payment not found'}), 404
         
-        return jsonify(payment)
+        # JSON servi tel quel depuis le cache ; l'ETag (contenu, donc status/updated_at)
+        # permet aux pollers de la saga de recevoir un 304 sans corps
+        response = app.response_class(payment_json, mimetype='application/json')
+        response.add_etag(weak=True)
+        return response.make_conditional(request)
         
     except Exception as e:
-        logger.error(f"❌ Error getting payment {payment_id}: {e}")
+        logger.error("❌ Error getting payment %s: %s", payment_id, e)
         return jsonify({
             'error': 'Failed to get payment',
             'message': str(e)
@@ -106,7 +143,7 @@ def update_payment_status(payment_id):
     except ValueError as e:
         return jsonify({'error': str(e)}), 404
     except Exception as e:
-        logger.error(f"❌ Error updating payment status {payment_id}: {e}")
+        logger.error("❌ Error updating payment status %s: %s", payment_id, e)
         return jsonify({
             'error': 'Failed to update payment status',
             'message': str(e)
@@ -133,7 +170,7 @@ def compensate_payment(payment_id):
         })
         
     except Exception as e:
-        logger.error(f"❌ Error compensating payment {payment_id}: {e}")
+        logger.error("❌ Error compensating payment %s: %s", payment_id, e)
         return jsonify({
             'error': 'Failed to compensate payment',
             'message': str(e)
@@ -150,6 +187,9 @@ def internal_error(error):
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 5000))
     debug = os.environ.get('DEBUG', 'false').lower() == 'true'
-    logger.info(f"🚀 Starting Payment Service on port {port}")
-    logger.info(f"💾 Using PostgreSQL + Redis (Polyglot Persistence)")
+    logger.info("🚀 Starting Payment Service on port %s", port)
+    logger.info("💾 Using PostgreSQL + Redis (Polyglot Persistence)")
+    # En production, le schéma est créé par schema.py avant gunicorn
+    from schema import create_schema
+    create_schema()
     app.run(host='0.0.0.0', port=port, debug=debug)
@@ -0,0 +1,160 @@
+"""
+Point d'entrée ASGI du Service Paiements (alternative à app.py)
+
+Mêmes routes /api/payments que l'application Flask, mais les attentes
+PostgreSQL (asyncpg) et Redis (redis.asyncio) ne bloquent plus un worker :
+un seul processus peut servir des centaines de requêtes I/O concurrentes.
+
+Lancement (port distinct pour comparer avec gunicorn app:app) :
+    python schema.py && hypercorn asgi:app --bind 0.0.0.0:5002
+
+Avec plusieurs processus (hypercorn --workers N), définir ASGI_WORKERS=N pour
+que le pool asyncpg de chacun reste dans DB_CONNECTION_BUDGET.
+"""
+
+from quart import Quart, request, jsonify
+import os
+import asyncio
+import logging
+from logging_setup import configure_logging
+from datetime import datetime
+from config import cache_manager, registry
+from services.async_payment_service import async_payment_service
+from compensations.payment_compensation import compensation_service
+
+app = Quart(__name__)
+
+# Configuration du logging
+configure_logging()
+logger = logging.getLogger(__name__)
+
+@app.after_serving
+async def close_clients():
+    await registry.get('async_redis').aclose()
+    await registry.get('async_engine').dispose()
+
+@app.after_request
+async def add_cors_headers(response):
+    response.headers['Access-Control-Allow-Origin'] = '*'
+    return response
+
+@app.route('/health', methods=['GET'])
+async def health():
+    return jsonify({
+        'status': 'OK',
+        'service': 'payment-service',
+        'mode': 'asgi',
+        'timestamp': datetime.now().isoformat(),
+        'database': 'PostgreSQL + Redis',
+        'cache_circuit': cache_manager.metrics()
+    })
+
+@app.route('/api/payments', methods=['POST'])
+async def create_payment():
+    try:
+        data = await request.get_json()
+        logger.info("💳 Creating payment", extra={'reservation_id': data.get('reservation_id'), 'user_id': data.get('user_id')})
+        logger.debug("Payment payload: %s", data)
+        
+        required_fields = ['reservation_id', 'user_id', 'amount', 'payment_method']
+        for field in required_fields:
+            if field not in data:
+                return jsonify({'error': f'Missing required field: {field}'}), 400
+        
+        payment = await async_payment_service.create_payment(data)
+        
+        return jsonify({
+            'success': True,
+            'payment': payment.to_dict(),
+            'message': 'Payment created successfully'
+        }), 201
+        
+    except Exception as e:
+        logger.error("❌ Error creating payment: %s", e)
+        return jsonify({
+            'error': 'Failed to create payment',
+            'message': str(e)
+        }), 500
+
+@app.route('/api/payments/<int:payment_id>', methods=['GET'])
+async def get_payment(payment_id):
+    try:
+        payment = await async_payment_service.get_payment_by_id(payment_id)
+        if not payment:
+            return jsonify({'error': 'Payment not found'}), 404
+        
+        return jsonify(payment)
+        
+    except Exception as e:
+        logger.error("❌ Error getting payment %s: %s", payment_id, e)
+        return jsonify({
+            'error': 'Failed to get payment',
+            'message': str(e)
+        }), 500
+
+@app.route('/api/payments/<int:payment_id>/status', methods=['PUT'])
+async def update_payment_status(payment_id):
+    try:
+        data = await request.get_json()
+        status = data.get('status')
+        metadata = data.get('metadata', {})
+        
+        if not status:
+            return jsonify({'error': 'Status is required'}), 400
+        
+        payment = await async_payment_service.update_payment_status(payment_id, status, metadata)
+        
+        return jsonify({
+            'success': True,
+            'payment': payment.to_dict(),
+            'message': 'Payment status updated successfully'
+        })
+        
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 404
+    except Exception as e:
+        logger.error("❌ Error updating payment status %s: %s", payment_id, e)
+        return jsonify({
+            'error': 'Failed to update payment status',
+            'message': str(e)
+        }), 500
+
+@app.route('/api/payments/<int:payment_id>/compensate', methods=['POST'])
+async def compensate_payment(payment_id):
+    try:
+        data = await request.get_json()
+        reason = data.get('reason', 'Saga compensation')
+        
+        # La compensation reste synchrone : exécutée hors de la boucle d'événements
+        if not await asyncio.to_thread(compensation_service.can_compensate_payment, payment_id):
+            return jsonify({
+                'error': 'Payment cannot be compensated',
+                'message': 'Payment is not eligible for refund'
+            }), 400
+        
+        await asyncio.to_thread(compensation_service.compensate_payment, payment_id, reason)
+        
+        return jsonify({
+            'success': True,
+            'message': f'Payment {payment_id} compensated successfully'
+        })
+        
+    except Exception as e:
+        logger.error("❌ Error compensating payment %s: %s", payment_id, e)
+        return jsonify({
+            'error': 'Failed to compensate payment',
+            'message': str(e)
+        }), 500
+
+@app.errorhandler(404)
+async def not_found(error):
+    return jsonify({'error': 'Not found'}), 404
+
+@app.errorhandler(500)
+async def internal_error(error):
+    return jsonify({'error': 'Internal server error'}), 500
+
+if __name__ == '__main__':
+    port = int(os.environ.get('PORT', 5002))
+    logger.info("🚀 Starting Payment Service (ASGI) on port %s", port)
+    app.run(host='0.0.0.0', port=port)
@@ -0,0 +1,274 @@
+"""
+Benchmark reproductible des chemins cache-aside du Service Paiements
+
+Exécute l'application Flask (routes, cache-aside, circuit breaker...) contre
+des substituts locaux : SQLite (ou un PostgreSQL local jetable via
+BENCH_POSTGRES_URL) et fakeredis. Aucun docker-compose nécessaire.
+
+Pour chaque combinaison taille du jeu de données x taux de hit x concurrence
+x TTL, mesure create, get (hit / miss) et update_status : débit,
+p50/p95/p99 et allers-retours SQL / Redis moyens (profiling.capture).
+La compensation n'est pas mesurée : can_compensate_payment est encore un
+squelette qui refuse tout paiement (400 sans aller-retour).
+
+Usage (depuis payment-service/) :
+    pip install -r benchmarks/requirements.txt
+    python -m benchmarks.bench_cache_aside --sizes 1000,10000 --hit-ratios 0,0.9 \\
+        --concurrency 1,8 --ttls 3600 --ops 500 --output results.json
+    python -m benchmarks.bench_cache_aside --compare before.json after.json
+"""
+
+import os
+import sys
+import tempfile
+
+# Substituts locaux : à définir avant l'import de config
+_db_path = os.path.join(tempfile.gettempdir(), 'payment_bench.db')
+os.environ['POSTGRES_URL'] = os.getenv('BENCH_POSTGRES_URL', f'sqlite:///{_db_path}')
+os.environ.setdefault('LOG_LEVEL', 'WARNING')
+# Le benchmark mesure la latence des chemins, pas le délestage
+os.environ.setdefault('ADMISSION_MAX_IN_FLIGHT', '100000')
+os.environ.pop('PROMETHEUS_MULTIPROC_DIR', None)
+
+import argparse
+import itertools
+import json
+import platform
+import random
+import statistics
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import fakeredis
+from sqlalchemy import insert
+
+from config import Base, cache_manager, registry
+
+_fake_server = fakeredis.FakeServer()
+registry.register('redis', lambda: fakeredis.FakeRedis(server=_fake_server, decode_responses=True))
+
+import profiling
+from app import app
+from models.payment import Payment
+from services.cache_warmup_service import cache_warmup_service
+
+OPERATIONS = ('create', 'get_hit', 'get_miss', 'update_status')
+STATUSES = ('pending', 'processing', 'completed', 'failed')
+
+
+def reset_state(dataset_size):
+    """Base et cache vides, puis dataset_size paiements insérés en bloc"""
+    engine = registry.get('engine')
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    registry.get('redis').flushall()
+
+    rows = [
+        {
+            'reservation_id': f'res-{i}',
+            'user_id': f'user-{i % 500}',
+            'amount': round(random.uniform(1000, 50000), 2),
+            'currency': 'XOF',
+            'payment_method': random.choice(('card', 'mobile_money', 'bank_transfer')),
+            'status': random.choice(STATUSES),
+            'transaction_id': f'bench-{i}',
+        }
+        for i in range(dataset_size)
+    ]
+    with engine.begin() as conn:
+        for start in range(0, len(rows), 5000):
+            conn.execute(insert(Payment), rows[start:start + 5000])
+
+
+class Runner:
+    """Exécute une opération via le client de test Flask et collecte les mesures"""
+
+    def __init__(self, dataset_size):
+        self.dataset_size = dataset_size
+        self._local = threading.local()
+
+    @property
+    def client(self):
+        if not hasattr(self._local, 'client'):
+            self._local.client = app.test_client()
+        return self._local.client
+
+    def random_id(self):
+        return random.randint(1, self.dataset_size)
+
+    def prepare(self, operation):
+        """Mise en condition hors mesure (ex. éviction pour un miss)"""
+        payment_id = self.random_id()
+        if operation == 'get_hit' and not cache_manager.exists(Payment.cache_key(payment_id)):
+            self.client.get(f'/api/payments/{payment_id}')
+        elif operation == 'get_miss':
+            cache_manager.delete(Payment.cache_key(payment_id))
+        return payment_id
+
+    def execute(self, operation, payment_id):
+        if operation == 'create':
+            return self.client.post('/api/payments', json={
+                'reservation_id': f'res-new-{payment_id}', 'user_id': 'bench',
+                'amount': 15000, 'payment_method': 'card'
+            })
+        if operation in ('get_hit', 'get_miss'):
+            return self.client.get(f'/api/payments/{payment_id}')
+        if operation == 'update_status':
+            return self.client.put(f'/api/payments/{payment_id}/status', json={
+                'status': random.choice(STATUSES), 'metadata': {'bench': True}
+            })
+        raise ValueError(f'Unknown operation: {operation}')
+
+    def run_once(self, operation):
+        payment_id = self.prepare(operation)
+        with profiling.capture(operation) as profile:
+            started = time.perf_counter()
+            response = self.execute(operation, payment_id)
+            elapsed = time.perf_counter() - started
+        return elapsed, response.status_code < 400, profile.count('sql'), profile.count('redis')
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def run_batch(call, ops, concurrency):
+    """Exécute call() ops fois avec concurrency clients et résume les mesures"""
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        started = time.perf_counter()
+        results = list(pool.map(lambda _: call(), range(ops)))
+        wall = time.perf_counter() - started
+
+    latencies = sorted(r[0] * 1000 for r in results)
+    return {
+        'ops': ops,
+        'errors': sum(1 for r in results if not r[1]),
+        'throughput_ops_s': round(ops / wall, 2),
+        'mean_ms': round(statistics.fmean(latencies), 3),
+        'p50_ms': round(percentile(latencies, 50), 3),
+        'p95_ms': round(percentile(latencies, 95), 3),
+        'p99_ms': round(percentile(latencies, 99), 3),
+        'sql_round_trips': round(statistics.fmean(r[2] for r in results), 3),
+        'redis_round_trips': round(statistics.fmean(r[3] for r in results), 3),
+    }
+
+
+def run_scenario(dataset_size, hit_ratio, concurrency, ttl, ops):
+    reset_state(dataset_size)
+    cache_manager.default_ttl = ttl
+    cache_warmup_service.warm_up(hours=24 * 365, ttl_seconds=ttl, ttl_jitter=0)
+
+    runner = Runner(dataset_size)
+    results = {op: run_batch(lambda op=op: runner.run_once(op), ops, concurrency) for op in OPERATIONS}
+    # Lecture au taux de hit cible : chaque requête est un hit ou un miss tiré au sort
+    results['get'] = run_batch(
+        lambda: runner.run_once('get_hit' if random.random() < hit_ratio else 'get_miss'), ops, concurrency
+    )
+    return {
+        'dataset_size': dataset_size,
+        'hit_ratio': hit_ratio,
+        'concurrency': concurrency,
+        'ttl': ttl,
+        'operations': results,
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_scenario(scenario):
+    print(f"\n== size={scenario['dataset_size']} hit_ratio={scenario['hit_ratio']} "
+          f"concurrency={scenario['concurrency']} ttl={scenario['ttl']}")
+    print(f"{'operation':<14}{'ops/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'sql':>7}{'redis':>7}{'err':>5}")
+    for name, r in scenario['operations'].items():
+        print(f"{name:<14}{r['throughput_ops_s']:>10}{r['p50_ms']:>10}{r['p95_ms']:>10}{r['p99_ms']:>10}"
+              f"{r['sql_round_trips']:>7}{r['redis_round_trips']:>7}{r['errors']:>5}")
+
+
+def scenario_key(scenario):
+    return (scenario['dataset_size'], scenario['hit_ratio'], scenario['concurrency'], scenario['ttl'])
+
+
+def compare(before_path, after_path):
+    """Affiche l'évolution du p95 et des allers-retours entre deux fichiers de résultats"""
+    with open(before_path) as f:
+        before = {scenario_key(s): s for s in json.load(f)['scenarios']}
+    with open(after_path) as f:
+        after = json.load(f)['scenarios']
+
+    for scenario in after:
+        previous = before.get(scenario_key(scenario))
+        if previous is None:
+            continue
+        print(f"\n== size={scenario['dataset_size']} hit_ratio={scenario['hit_ratio']} "
+              f"concurrency={scenario['concurrency']} ttl={scenario['ttl']}")
+        for name, r in scenario['operations'].items():
+            old = previous['operations'].get(name)
+            if not old:
+                continue
+            delta = (r['p95_ms'] - old['p95_ms']) / old['p95_ms'] * 100 if old['p95_ms'] else 0.0
+            print(f"{name:<14} p95 {old['p95_ms']:>9} -> {r['p95_ms']:>9} ms ({delta:+.1f}%)  "
+                  f"sql {old['sql_round_trips']} -> {r['sql_round_trips']}  "
+                  f"redis {old['redis_round_trips']} -> {r['redis_round_trips']}")
+
+
+def parse_list(value, cast):
+    return [cast(v) for v in value.split(',') if v]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark cache-aside du Service Paiements')
+    parser.add_argument('--sizes', default='1000', help='Tailles du jeu de données (liste)')
+    parser.add_argument('--hit-ratios', default='0.9', help='Taux de hit cible des lectures (liste)')
+    parser.add_argument('--concurrency', default='1,8', help='Nombre de clients concurrents (liste)')
+    parser.add_argument('--ttls', default='3600', help='TTL du cache en secondes (liste)')
+    parser.add_argument('--ops', type=int, default=200, help='Requêtes mesurées par opération')
+    parser.add_argument('--seed', type=int, default=42, help='Graine aléatoire (reproductibilité)')
+    parser.add_argument('--output', help='Fichier JSON de résultats')
+    parser.add_argument('--compare', nargs=2, metavar=('BEFORE', 'AFTER'), help='Compare deux fichiers de résultats')
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        compare(*args.compare)
+        return 0
+
+    random.seed(args.seed)
+    report = {
+        'revision': git_revision(),
+        'timestamp': datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'database': os.environ['POSTGRES_URL'].split('@')[-1],
+        'redis': 'fakeredis',
+        'parameters': vars(args),
+        'scenarios': [],
+    }
+    sweep = itertools.product(
+        parse_list(args.sizes, int),
+        parse_list(args.hit_ratios, float),
+        parse_list(args.concurrency, int),
+        parse_list(args.ttls, int),
+    )
+    for dataset_size, hit_ratio, concurrency, ttl in sweep:
+        scenario = run_scenario(dataset_size, hit_ratio, concurrency, ttl, args.ops)
+        report['scenarios'].append(scenario)
+        print_scenario(scenario)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults written to {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
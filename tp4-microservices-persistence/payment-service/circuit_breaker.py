@@ -0,0 +1,123 @@
+"""
+Circuit breaker pour les dépendances non critiques (Redis)
+
+Quand Redis se dégrade, chaque appel peut bloquer jusqu'à socket_timeout
+avant de retomber sur PostgreSQL. Le disjoncteur coupe court :
+
+- closed    : les appels passent, les échecs consécutifs sont comptés
+- open      : les appels sont ignorés immédiatement (fallback base de données)
+- half_open : après recovery_timeout, un seul appel de sonde est autorisé ;
+              succès -> closed, échec -> open
+"""
+
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+STATE_CLOSED = 'closed'
+STATE_OPEN = 'open'
+STATE_HALF_OPEN = 'half_open'
+
+# Valeur numérique exportée pour la jauge d'état (0 = sain)
+STATE_VALUES = {STATE_CLOSED: 0, STATE_HALF_OPEN: 1, STATE_OPEN: 2}
+
+
+class CircuitBreaker:
+    def __init__(self, name, failure_threshold=5, recovery_timeout=30.0, clock=time.monotonic, listener=None):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self._clock = clock
+        # listener(ancien_état, nouvel_état, valeur_numérique) : export des changements d'état
+        self._listener = listener
+        self._lock = threading.Lock()
+        self._state = STATE_CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+
+        # Compteurs exportés via metrics()
+        self.transitions = {}
+        self.short_circuited = 0
+        self.successes = 0
+        self.failures = 0
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._state == STATE_OPEN and self._recovery_elapsed():
+                return STATE_HALF_OPEN
+            return self._state
+
+    def allow_request(self):
+        """Indique si l'appel peut être tenté ; sinon il doit être court-circuité"""
+        with self._lock:
+            if self._state == STATE_CLOSED:
+                return True
+
+            if self._state == STATE_OPEN:
+                if not self._recovery_elapsed():
+                    self.short_circuited += 1
+                    return False
+                self._transition(STATE_HALF_OPEN)
+
+            # half_open : une seule sonde à la fois
+            if self._probe_in_flight:
+                self.short_circuited += 1
+                return False
+            self._probe_in_flight = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.successes += 1
+            self._failures = 0
+            self._probe_in_flight = False
+            if self._state != STATE_CLOSED:
+                self._transition(STATE_CLOSED)
+
+    def release_probe(self):
+        """
+        Appel interrompu sans verdict (CancelledError, KeyboardInterrupt...) :
+        libère la sonde half_open sans compter ni succès ni échec
+        """
+        with self._lock:
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._failures += 1
+            self._probe_in_flight = False
+            if self._state == STATE_HALF_OPEN or self._failures >= self.failure_threshold:
+                self._opened_at = self._clock()
+                if self._state != STATE_OPEN:
+                    self._transition(STATE_OPEN)
+
+    def metrics(self):
+        """Instantané des compteurs du disjoncteur"""
+        state = self.state
+        with self._lock:
+            return {
+                'name': self.name,
+                'state': state,
+                'state_value': STATE_VALUES[state],
+                'consecutive_failures': self._failures,
+                'successes': self.successes,
+                'failures': self.failures,
+                'short_circuited': self.short_circuited,
+                'transitions': dict(self.transitions),
+            }
+
+    def _recovery_elapsed(self):
+        return self._clock() - self._opened_at >= self.recovery_timeout
+
+    def _transition(self, new_state):
+        key = f"{self._state}->{new_state}"
+        self.transitions[key] = self.transitions.get(key, 0) + 1
+        logger.warning("⚡ Circuit %s: %s -> %s", self.name, self._state, new_state)
+        if self._listener:
+            self._listener(self._state, new_state, STATE_VALUES[new_state])
+        self._state = new_state
@@ -63,7 +63,7 @@ class PaymentCompensationService:
             pass  # Placeholder - à remplacer
             
         except Exception as e:
-            self.logger.error(f"Failed to compensate payment {payment_id}: {e}")
+            self.logger.error("Failed to compensate payment %s: %s", payment_id, e)
             db.rollback()
             raise e
         finally:
@@ -126,11 +126,11 @@ class PaymentCompensationService:
             payment.status = 'refunded'
             payment.metadata = f"Refunded: {reason}"
             
-            self.logger.info(f"Refund processed for payment {payment.id}")
+            self.logger.info("Refund processed for payment %s", payment.id)
             return True
             
         except Exception as e:
-            self.logger.error(f"Refund processing failed for payment {payment.id}: {e}")
+            self.logger.error("Refund processing failed for payment %s: %s", payment.id, e)
             return False
 
 compensation_service = PaymentCompensationService()
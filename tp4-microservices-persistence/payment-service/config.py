@@ -7,10 +7,21 @@ Redis: Pour le cache haute performance et les sessions
 """
 
 import os
+import socket
+import time
+import logging
 import redis
+import redis.asyncio as aioredis
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from circuit_breaker import CircuitBreaker
+from resources import registry
+from metrics import instrument_engine, record_cache_operation, record_circuit_transition
+import profiling
+
+logger = logging.getLogger(__name__)
 
 # Configuration PostgreSQL pour les transactions
 POSTGRES_URL = os.getenv(
@@ -21,64 +32,334 @@ POSTGRES_URL = os.getenv(
 # Configuration Redis pour le cache
 REDIS_URL = os.getenv('REDIS_URL', 'redis://localhost:6379/0')
 
-# SQLAlchemy setup
-engine = create_engine(
-    POSTGRES_URL,
-    pool_size=20,
-    max_overflow=30,
-    pool_pre_ping=True,
-    echo=True if os.getenv('DEBUG') == 'true' else False
+# Budget de connexions PostgreSQL réparti entre les workers gunicorn
+WEB_CONCURRENCY = int(os.getenv('WEB_CONCURRENCY', '4'))
+DB_CONNECTION_BUDGET = int(os.getenv('DB_CONNECTION_BUDGET', '40'))
+
+
+def pool_settings(workers=WEB_CONCURRENCY, budget=DB_CONNECTION_BUDGET):
+    """Taille de pool par processus : workers x (pool_size + max_overflow) <= budget"""
+    per_worker = max(2, budget // max(1, workers))
+    pool_size = max(1, per_worker // 2)
+    return {'pool_size': pool_size, 'max_overflow': per_worker - pool_size}
+
+
+# SQLAlchemy setup : moteur et client Redis créés paresseusement, par processus
+def _create_engine():
+    options = {}
+    if not POSTGRES_URL.startswith('sqlite'):
+        options.update(pool_settings())
+    engine = create_engine(
+        POSTGRES_URL,
+        pool_pre_ping=True,
+        echo=True if os.getenv('DEBUG') == 'true' else False,
+        **options
+    )
+    return profiling.instrument_engine(instrument_engine(engine))
+
+
+def _create_redis_client():
+    return redis.Redis.from_url(
+        REDIS_URL,
+        decode_responses=True,
+        socket_connect_timeout=5,
+        socket_timeout=5,
+        retry_on_timeout=True
+    )
+
+
+registry.register(
+    'engine',
+    _create_engine,
+    after_fork=lambda e: e.dispose(close=False),
+    close=lambda e: e.dispose()
 )
+registry.register('redis', _create_redis_client, close=lambda r: r.close())
+
+engine = registry.lazy('engine')
+redis_client = registry.lazy('redis')
+
+_session_factory = sessionmaker(autocommit=False, autoflush=False)
+
+
+def SessionLocal():
+    return _session_factory(bind=registry.get('engine'))
+
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
-# Redis setup
-redis_client = redis.Redis.from_url(
-    REDIS_URL,
-    decode_responses=True,
-    socket_connect_timeout=5,
-    socket_timeout=5,
-    retry_on_timeout=True
+
+# Mode ASGI (asgi.py) : moteur asyncpg et client redis.asyncio, créés eux aussi par processus
+def _async_url(url):
+    if url.startswith('postgresql://'):
+        return url.replace('postgresql://', 'postgresql+asyncpg://', 1)
+    if url.startswith('sqlite://'):
+        return url.replace('sqlite://', 'sqlite+aiosqlite://', 1)
+    return url
+
+
+ASYNC_POSTGRES_URL = os.getenv('ASYNC_POSTGRES_URL', _async_url(POSTGRES_URL))
+# Processus du serveur ASGI (hypercorn --workers) : le budget se partage entre eux,
+# pas entre les WEB_CONCURRENCY workers gunicorn
+ASGI_WORKERS = int(os.getenv('ASGI_WORKERS', '1'))
+
+
+def _create_async_engine():
+    options = {}
+    if not ASYNC_POSTGRES_URL.startswith('sqlite'):
+        options.update(pool_settings(workers=ASGI_WORKERS))
+    engine = create_async_engine(
+        ASYNC_POSTGRES_URL,
+        pool_pre_ping=True,
+        echo=True if os.getenv('DEBUG') == 'true' else False,
+        **options
+    )
+    profiling.instrument_engine(engine.sync_engine)
+    return engine
+
+
+def _create_async_redis_client():
+    return aioredis.Redis.from_url(
+        REDIS_URL,
+        decode_responses=True,
+        socket_connect_timeout=5,
+        socket_timeout=5,
+        retry_on_timeout=True
+    )
+
+
+registry.register(
+    'async_engine',
+    _create_async_engine,
+    after_fork=lambda e: e.sync_engine.dispose(close=False)
 )
+registry.register('async_redis', _create_async_redis_client)
+
+async_redis_client = registry.lazy('async_redis')
+
+_async_session_factory = async_sessionmaker(autoflush=False, expire_on_commit=False, class_=AsyncSession)
+
+
+def AsyncSessionLocal():
+    return _async_session_factory(bind=registry.get('async_engine'))
+
+# TTL par défaut des entrées payment:{id} (secondes)
+PAYMENT_CACHE_TTL = int(os.getenv('PAYMENT_CACHE_TTL', '3600'))
+
+# Circuit breaker Redis : seuil d'échecs consécutifs et délai avant sonde (secondes)
+CACHE_CB_FAILURE_THRESHOLD = int(os.getenv('CACHE_CB_FAILURE_THRESHOLD', '5'))
+CACHE_CB_RECOVERY_TIMEOUT = float(os.getenv('CACHE_CB_RECOVERY_TIMEOUT', '30'))
+
+def _cache_result(operation, result):
+    if operation == 'get':
+        return 'hit' if result is not None else 'miss'
+    return 'ok'
+
 
 # =========================================================================
 # TODO-POLY1: Implémentez la classe CacheManager pour gérer le cache Redis
 # =========================================================================
 
 class CacheManager:
-    def __init__(self, redis_client):
+    def __init__(self, redis_client, breaker=None, default_ttl=PAYMENT_CACHE_TTL):
         self.redis = redis_client
+        self.default_ttl = default_ttl
+        # Disjoncteur : évite de bloquer socket_timeout secondes par appel quand Redis est dégradé
+        self.breaker = breaker or CircuitBreaker(
+            'redis',
+            failure_threshold=CACHE_CB_FAILURE_THRESHOLD,
+            recovery_timeout=CACHE_CB_RECOVERY_TIMEOUT,
+            listener=record_circuit_transition
+        )
 
-    def get(self, key):
+    def _call(self, operation, default, *args, **kwargs):
+        if not self.breaker.allow_request():
+            record_cache_operation(operation, 'short_circuit')
+            return default
+        started = time.perf_counter()
         try:
-            return self.redis.get(key)
+            result = getattr(self.redis, operation)(*args, **kwargs)
         except redis.RedisError as e:
-            print(f"Redis get error: {e}")
-            return None
+            self.breaker.record_failure()
+            record_cache_operation(operation, 'error')
+            logger.warning("Redis %s error: %s", operation, e)
+            return default
+        except Exception:
+            # Autre erreur côté I/O (décodage...) : compte comme un échec et libère la sonde
+            self.breaker.record_failure()
+            record_cache_operation(operation, 'error')
+            raise
+        except BaseException:
+            # Annulation (déconnexion client, arrêt) : Redis n'est pas en cause
+            self.breaker.release_probe()
+            raise
+        finally:
+            profiling.record_round_trip('redis', time.perf_counter() - started)
+        self.breaker.record_success()
+        record_cache_operation(operation, _cache_result(operation, result))
+        return result
+
+    def get(self, key):
+        return self._call('get', None, key)
 
     def set(self, key, value, ttl=None):
+        if ttl:
+            return self._call('setex', False, key, ttl, value)
+        return self._call('set', False, key, value)
+
+    def get_many(self, keys):
+        """MGET : une valeur (ou None) par clé, dans le même ordre"""
+        return self._call('mget', [None] * len(keys), keys)
+
+    def scan(self, cursor=0, match=None, count=None):
+        """Un pas de SCAN ; retourne (0, []) si Redis est indisponible"""
+        return self._call('scan', (0, []), cursor, match, count)
+
+    def delete(self, *keys):
+        return self._call('delete', False, *keys)
+
+    def try_lock(self, name, ttl):
+        """Verrou best-effort (SET NX EX) : True pour un seul appelant jusqu'à expiration du ttl"""
+        return bool(self._call('set', None, f'lock:{name}', f'{socket.gethostname()}:{os.getpid()}', ex=ttl, nx=True))
+
+    def set_many(self, entries, nx=False):
+        """
+        Écrit un lot (key, value, ttl) en un seul aller-retour via pipeline.
+
+        nx=True n'écrit que les clés absentes (SET NX EX) : une entrée déjà
+        rafraîchie par le trafic n'est pas écrasée par une valeur plus ancienne.
+        Retourne le nombre de clés réellement écrites, ou None si Redis est
+        indisponible.
+        """
+        if not self.breaker.allow_request():
+            record_cache_operation('pipeline', 'short_circuit')
+            return None
+        started = time.perf_counter()
         try:
-            if ttl:
-                return self.redis.setex(key, ttl, value)
-            return self.redis.set(key, value)
+            pipe = self.redis.pipeline(transaction=False)
+            for key, value, ttl in entries:
+                if nx:
+                    pipe.set(key, value, ex=ttl, nx=True)
+                else:
+                    pipe.setex(key, ttl, value)
+            # SET NX renvoie None pour une clé déjà présente
+            written = sum(1 for result in pipe.execute() if result)
         except redis.RedisError as e:
-            print(f"Redis set error: {e}")
-            return False
+            self.breaker.record_failure()
+            record_cache_operation('pipeline', 'error')
+            logger.warning("Redis pipeline error: %s", e)
+            return None
+        except Exception:
+            self.breaker.record_failure()
+            record_cache_operation('pipeline', 'error')
+            raise
+        except BaseException:
+            self.breaker.release_probe()
+            raise
+        finally:
+            profiling.record_round_trip('redis', time.perf_counter() - started)
+        self.breaker.record_success()
+        record_cache_operation('pipeline', 'ok')
+        return written
 
-    def delete(self, key):
+    def compare_and_set_many(self, entries):
+        """
+        Réécrit un lot (key, expected, value, ttl) seulement si aucune clé n'a
+        changé depuis sa lecture (WATCH / MULTI). False en cas de conflit ou si
+        Redis est indisponible : l'appelant peut alors évincer les clés.
+        """
+        if not self.breaker.allow_request():
+            record_cache_operation('pipeline', 'short_circuit')
+            return False
+        keys = [key for key, _, _, _ in entries]
+        started = time.perf_counter()
         try:
-            return self.redis.delete(key)
+            with self.redis.pipeline() as pipe:
+                pipe.watch(*keys)
+                if pipe.mget(keys) != [expected for _, expected, _, _ in entries]:
+                    pipe.unwatch()
+                    result = 'conflict'
+                else:
+                    pipe.multi()
+                    for key, _, value, ttl in entries:
+                        pipe.setex(key, ttl, value)
+                    pipe.execute()
+                    result = 'ok'
+        except redis.WatchError:
+            result = 'conflict'  # Une écriture concurrente a eu lieu entre WATCH et EXEC
         except redis.RedisError as e:
-            print(f"Redis delete error: {e}")
+            self.breaker.record_failure()
+            record_cache_operation('pipeline', 'error')
+            logger.warning("Redis pipeline error: %s", e)
             return False
+        except Exception:
+            self.breaker.record_failure()
+            record_cache_operation('pipeline', 'error')
+            raise
+        except BaseException:
+            self.breaker.release_probe()
+            raise
+        finally:
+            profiling.record_round_trip('redis', time.perf_counter() - started)
+        self.breaker.record_success()
+        record_cache_operation('pipeline', result)
+        return result == 'ok'
 
     def exists(self, key):
+        return self._call('exists', 0, key) > 0
+
+    def metrics(self):
+        return self.breaker.metrics()
+
+
+class AsyncCacheManager:
+    """Équivalent asynchrone de CacheManager, partageant le même disjoncteur"""
+
+    def __init__(self, redis_client, breaker):
+        self.redis = redis_client
+        self.breaker = breaker
+
+    async def _call(self, operation, default, *args):
+        if not self.breaker.allow_request():
+            record_cache_operation(operation, 'short_circuit')
+            return default
+        started = time.perf_counter()
         try:
-            return self.redis.exists(key) > 0  
+            result = await getattr(self.redis, operation)(*args)
         except redis.RedisError as e:
-            print(f"Redis exists error: {e}")
-            return False
+            self.breaker.record_failure()
+            record_cache_operation(operation, 'error')
+            logger.warning("Redis %s error: %s", operation, e)
+            return default
+        except Exception:
+            # Autre erreur côté I/O (décodage...) : compte comme un échec et libère la sonde
+            self.breaker.record_failure()
+            record_cache_operation(operation, 'error')
+            raise
+        except BaseException:
+            # Annulation (déconnexion client, arrêt) : Redis n'est pas en cause
+            self.breaker.release_probe()
+            raise
+        finally:
+            profiling.record_round_trip('redis', time.perf_counter() - started)
+        self.breaker.record_success()
+        record_cache_operation(operation, _cache_result(operation, result))
+        return result
+
+    async def get(self, key):
+        return await self._call('get', None, key)
+
+    async def set(self, key, value, ttl=None):
+        if ttl:
+            return await self._call('setex', False, key, ttl, value)
+        return await self._call('set', False, key, value)
+
+    async def delete(self, *keys):
+        return await self._call('delete', False, *keys)
+
+    def metrics(self):
+        return self.breaker.metrics()
 
 
 cache_manager = CacheManager(redis_client)
+async_cache_manager = AsyncCacheManager(async_redis_client, cache_manager.breaker)
@@ -0,0 +1,42 @@
+"""
+Configuration gunicorn du Service Paiements
+
+Le nombre de workers (WEB_CONCURRENCY) sert aussi à dimensionner les pools
+de connexions (voir config.pool_settings). Le code applicatif n'est pas
+préchargé : chaque worker crée ses clients après le fork.
+
+Les métriques Prometheus de tous les workers sont agrégées via
+PROMETHEUS_MULTIPROC_DIR.
+"""
+
+import os
+import shutil
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+workers = int(os.getenv('WEB_CONCURRENCY', '4'))
+# Workers threadés : le contrôle d'admission (admission.py) borne les requêtes en cours.
+# Les threads en surnombre (4x par défaut) portent les requêtes qui attendent une place
+# ou sont délestées ; à threads == limite, le surplus ferait la queue hors de sa vue.
+worker_class = 'gthread'
+threads = int(os.getenv('GUNICORN_THREADS', str(4 * int(os.getenv('ADMISSION_MAX_IN_FLIGHT', '8')))))
+preload_app = False
+
+
+def post_fork(server, worker):
+    # Filet de sécurité si preload_app est activé : repartir d'un registre vide
+    from resources import registry
+    registry.reset()
+
+
+def on_starting(server):
+    # Métriques multi-processus : repartir d'un répertoire vide à chaque démarrage
+    path = os.getenv('PROMETHEUS_MULTIPROC_DIR')
+    if path:
+        shutil.rmtree(path, ignore_errors=True)
+        os.makedirs(path, exist_ok=True)
+
+
+def child_exit(server, worker):
+    if os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,110 @@
+"""
+Métriques Prometheus du Service Paiements
+
+Exposées sur /metrics au format texte Prometheus. Sous gunicorn, chaque
+worker écrit ses valeurs dans PROMETHEUS_MULTIPROC_DIR et /metrics agrège
+tous les workers : le pod rapporte des chiffres globaux, quel que soit le
+worker qui répond au scrape.
+"""
+
+import os
+import time
+from flask import Response, g, request
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess
+)
+from sqlalchemy import event
+
+REQUEST_LATENCY = Histogram(
+    'http_request_duration_seconds', 'Latence des requêtes HTTP',
+    ['method', 'route', 'status']
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    'http_requests_in_flight', 'Requêtes HTTP en cours',
+    ['route'], multiprocess_mode='livesum'
+)
+ADMISSION_SHED = Counter(
+    'http_requests_shed_total', 'Requêtes refusées par le contrôle d\'admission (503)',
+    ['route_class']
+)
+
+CACHE_OPERATIONS = Counter(
+    'cache_operations_total', 'Opérations CacheManager par résultat (hit, miss, ok, conflict, error, short_circuit)',
+    ['operation', 'result']
+)
+CACHE_CIRCUIT_STATE = Gauge(
+    'cache_circuit_state', 'État du disjoncteur Redis (0 closed, 1 half_open, 2 open)',
+    multiprocess_mode='livemax'
+)
+CACHE_CIRCUIT_TRANSITIONS = Counter(
+    'cache_circuit_transitions_total', 'Changements d\'état du disjoncteur Redis',
+    ['from_state', 'to_state']
+)
+
+DB_POOL_CHECKED_OUT = Gauge(
+    'db_pool_checked_out', 'Connexions PostgreSQL empruntées au pool',
+    multiprocess_mode='livesum'
+)
+DB_POOL_OVERFLOW = Gauge(
+    'db_pool_overflow', 'Connexions PostgreSQL ouvertes au-delà de pool_size',
+    multiprocess_mode='livesum'
+)
+
+
+def record_cache_operation(operation, result):
+    CACHE_OPERATIONS.labels(operation, result).inc()
+
+
+def record_circuit_transition(old_state, new_state, state_value):
+    CACHE_CIRCUIT_TRANSITIONS.labels(old_state, new_state).inc()
+    CACHE_CIRCUIT_STATE.set(state_value)
+
+
+def instrument_engine(engine):
+    """Met à jour les jauges de saturation du pool à chaque emprunt / restitution"""
+    pool = engine.pool
+
+    def on_checkout(*args):
+        DB_POOL_CHECKED_OUT.inc()
+        DB_POOL_OVERFLOW.set(max(0, pool.overflow()))
+
+    def on_checkin(*args):
+        DB_POOL_CHECKED_OUT.dec()
+        DB_POOL_OVERFLOW.set(max(0, pool.overflow()))
+
+    event.listen(engine, 'checkout', on_checkout)
+    event.listen(engine, 'checkin', on_checkin)
+    return engine
+
+
+def init_app(app):
+    @app.before_request
+    def start_timer():
+        g.metrics_start = time.perf_counter()
+        g.metrics_route = request.url_rule.rule if request.url_rule else 'unmatched'
+        REQUESTS_IN_FLIGHT.labels(g.metrics_route).inc()
+
+    @app.after_request
+    def observe_latency(response):
+        if 'metrics_start' in g:
+            REQUEST_LATENCY.labels(request.method, g.metrics_route, response.status_code).observe(
+                time.perf_counter() - g.metrics_start
+            )
+        return response
+
+    @app.teardown_request
+    def end_request(exc):
+        if 'metrics_route' in g:
+            REQUESTS_IN_FLIGHT.labels(g.metrics_route).dec()
+
+    @app.route('/metrics', methods=['GET'])
+    def metrics():
+        return Response(render_latest(), mimetype=CONTENT_TYPE_LATEST)
+
+
+def render_latest():
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry)
+    return generate_latest()
@@ -8,10 +8,21 @@ Redis: Cache des données fréquemment accédées (performance)
 from sqlalchemy import Column, Integer, String, DateTime, Boolean, Text, Numeric, Sequence
 from decimal import Decimal
 from sqlalchemy.sql import func
-from config import Base, CacheManager, redis_client, cache_manager
+from config import Base, CacheManager, redis_client, cache_manager, async_cache_manager
 import json
+import logging
 from datetime import datetime, timedelta
 
+logger = logging.getLogger(__name__)
+
+# Statuts pour lesquels la saga peut encore interroger / modifier le paiement
+NON_TERMINAL_STATUSES = ('pending', 'processing', 'refunding')
+
+
+def _encode_cache_value(data):
+    """Unique encodeur des entrées payment:{id} (écriture et contrôle de forme)"""
+    return json.dumps(data, default=str)
+
 class Payment(Base):
     """
     Modèle de paiement combinant PostgreSQL (persistance) et Redis (cache)
@@ -39,10 +50,32 @@ class Payment(Base):
     updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
     completed_at = Column(DateTime)
 
+    @staticmethod
+    def cache_key(payment_id):
+        return f"payment:{payment_id}"
+
+    def to_cache_value(self):
+        # id en tête, quel que soit l'ordre de to_dict : is_valid_cache_value s'y fie
+        return _encode_cache_value({'id': self.id, **self.to_dict()})
+
+    @staticmethod
+    def is_valid_cache_value(payment_id, value):
+        """
+        Contrôle de forme sans json.loads : objet complet commençant par l'id
+        demandé. Le préfixe attendu sort du même encodeur que to_cache_value,
+        il suit donc tout changement de format.
+        """
+        prefix = _encode_cache_value({'id': payment_id})[:-1]
+        return (
+            value.startswith(prefix)
+            and value[len(prefix):len(prefix) + 1] in (',', '}')
+            and value.endswith('}')
+        )
+
     # =========================================================================
     # TODO-POLY2: Implémentez la méthode pour mettre en cache les données de paiement
     # =========================================================================
-    def cache_payment_data(self, ttl_seconds=3600):
+    def cache_payment_data(self, ttl_seconds=None):
         """
         Cette méthode doit sérialiser l'objet Payment et le stocker dans Redis avec TTL.
         
@@ -55,14 +88,15 @@ class Payment(Base):
         # ⚠️  TODO: À implémenter par les étudiants
         
         # Exemple de solution :
-        cache_key = f"payment:{self.id}"
-        payment_data = json.dumps(self.to_dict(), default=str)
+        cache_key = Payment.cache_key(self.id)
+        payment_data = self.to_cache_value()
+        ttl_seconds = ttl_seconds or cache_manager.default_ttl
         
         try:
             cache_manager.set(cache_key, payment_data, ttl_seconds)
-            print(f"Payment {self.id} cached with TTL {ttl_seconds}s")
+            logger.debug("Payment %s cached with TTL %ss", self.id, ttl_seconds)
         except Exception as e:
-            print(f"Failed to cache payment {self.id}: {e}")
+            logger.warning("Failed to cache payment %s: %s", self.id, e)
         
        # pass  # Placeholder - à remplacer
 
@@ -83,7 +117,7 @@ class Payment(Base):
         """
         # ⚠️  TODO: À implémenter par les étudiants
         
-        cache_key = f"payment:{payment_id}"
+        cache_key = cls.cache_key(payment_id)
         
         # Essayer le cache d'abord
         cached_data = cache_manager.get(cache_key)
@@ -104,6 +138,56 @@ class Payment(Base):
         
         #return None  # Placeholder - à remplacer
 
+    @classmethod
+    def get_payment_json_with_cache(cls, payment_id, session):
+        """
+        Cache-aside sans désérialisation : renvoie le JSON tel que stocké dans
+        Redis (ou fraîchement encodé depuis PostgreSQL), prêt à être servi.
+
+        Au lieu d'un json.loads, un contrôle de forme bon marché
+        (is_valid_cache_value) écarte une entrée tronquée ou corrompue : on
+        retombe alors sur PostgreSQL.
+        """
+        cached_data = cache_manager.get(cls.cache_key(payment_id))
+        if cached_data:
+            if cls.is_valid_cache_value(payment_id, cached_data):
+                return cached_data
+            logger.warning("Invalid cache entry for payment %s, reloading from database", payment_id)
+
+        payment = session.query(cls).filter(cls.id == payment_id).first()
+        if payment:
+            payment_data = payment.to_cache_value()
+            cache_manager.set(cls.cache_key(payment_id), payment_data, cache_manager.default_ttl)
+            return payment_data
+
+        return None
+
+    # Variantes asynchrones (asgi.py) : même clé, même format, même TTL
+    async def cache_payment_data_async(self, ttl_seconds=None):
+        try:
+            await async_cache_manager.set(
+                Payment.cache_key(self.id), self.to_cache_value(), ttl_seconds or cache_manager.default_ttl
+            )
+        except Exception as e:
+            logger.warning("Failed to cache payment %s: %s", self.id, e)
+
+    @classmethod
+    async def get_payment_with_cache_async(cls, payment_id, session):
+        """Cache-aside asynchrone : Redis d'abord, puis PostgreSQL (AsyncSession)"""
+        cached_data = await async_cache_manager.get(cls.cache_key(payment_id))
+        if cached_data:
+            try:
+                return json.loads(cached_data)
+            except json.JSONDecodeError:
+                pass
+
+        payment = await session.get(cls, payment_id)
+        if payment:
+            await payment.cache_payment_data_async()
+            return payment.to_dict()
+
+        return None
+
     def to_dict(self):
         """Sérialise l'objet Payment en dictionnaire"""
         return {
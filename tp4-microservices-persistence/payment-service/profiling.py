@@ -0,0 +1,181 @@
+"""
+Instrumentation par requête (opt-in) : allers-retours SQL / Redis et cProfile
+
+Remplace echo=True (global, illisible) par un compteur limité à la requête :
+nombre de requêtes SQL et de commandes Redis avec leur temps cumulé, plus un
+dump pstats optionnel. Activé par PROFILING_ENABLED=true, puis pour chaque
+requête portant l'en-tête X-Profile (1 ou cprofile) ou tirée au sort selon
+PROFILE_SAMPLE_RATE.
+
+Le résumé est renvoyé dans les en-têtes X-Profile-* et conservé (par
+processus) sur /debug/profiles/<id>. PROFILE_MAX_ROUND_TRIPS signale les
+requêtes qui dépassent leur budget d'allers-retours.
+
+Hors requête HTTP (scripts, benchmarks) :
+    with profiling.capture() as profile:
+        payment_service.get_payment_by_id(1)
+    assert profile.count('sql') <= 1
+"""
+
+import cProfile
+import io
+import logging
+import os
+import pstats
+import random
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from flask import g, jsonify, request
+from sqlalchemy import event
+
+PROFILING_ENABLED = os.getenv('PROFILING_ENABLED', 'false').lower() == 'true'
+PROFILE_SAMPLE_RATE = float(os.getenv('PROFILE_SAMPLE_RATE', '0'))
+PROFILE_MAX_ROUND_TRIPS = int(os.getenv('PROFILE_MAX_ROUND_TRIPS', '0'))
+
+logger = logging.getLogger(__name__)
+
+_current = ContextVar('request_profile', default=None)
+
+# Derniers profils de ce processus, consultables sur /debug/profiles
+recent_profiles = deque(maxlen=100)
+
+
+class RequestProfile:
+    def __init__(self, name, use_cprofile=False):
+        self.id = uuid.uuid4().hex[:12]
+        self.name = name
+        self.round_trips = {}
+        self.started = time.perf_counter()
+        self.duration = None
+        self.stats = None
+        self._profiler = cProfile.Profile() if use_cprofile else None
+
+    def record(self, kind, seconds):
+        count, total = self.round_trips.get(kind, (0, 0.0))
+        self.round_trips[kind] = (count + 1, total + seconds)
+
+    def count(self, kind=None):
+        if kind:
+            return self.round_trips.get(kind, (0, 0.0))[0]
+        return sum(count for count, _ in self.round_trips.values())
+
+    def start(self):
+        if self._profiler:
+            self._profiler.enable()
+
+    def stop(self):
+        self.duration = time.perf_counter() - self.started
+        if self._profiler:
+            self._profiler.disable()
+            out = io.StringIO()
+            pstats.Stats(self._profiler, stream=out).sort_stats('cumulative').print_stats(30)
+            self.stats = out.getvalue()
+            self._profiler = None
+
+    def summary(self):
+        return {
+            'id': self.id,
+            'name': self.name,
+            'duration_ms': round((self.duration or 0) * 1000, 3),
+            'round_trips': {
+                kind: {'count': count, 'time_ms': round(total * 1000, 3)}
+                for kind, (count, total) in self.round_trips.items()
+            },
+            'total_round_trips': self.count(),
+            'has_cprofile': self.stats is not None
+        }
+
+
+def record_round_trip(kind, seconds):
+    """Appelé par l'instrumentation (SQL, CacheManager) ; no-op hors profil"""
+    profile = _current.get()
+    if profile is not None:
+        profile.record(kind, seconds)
+
+
+@contextmanager
+def capture(name='capture', use_cprofile=False):
+    profile = RequestProfile(name, use_cprofile)
+    token = _current.set(profile)
+    profile.start()
+    try:
+        yield profile
+    finally:
+        profile.stop()
+        _current.reset(token)
+
+
+def instrument_engine(engine):
+    """Compte et chronomètre chaque requête SQL exécutée par ce moteur"""
+    @event.listens_for(engine, 'before_cursor_execute')
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('profile_query_start', []).append(time.perf_counter())
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info['profile_query_start'].pop()
+        record_round_trip('sql', time.perf_counter() - started)
+
+    @event.listens_for(engine, 'handle_error')
+    def handle_error(context):
+        # Requête en échec : after_cursor_execute n'est pas appelé
+        stack = context.connection.info.get('profile_query_start') if context.connection else None
+        if stack:
+            record_round_trip('sql', time.perf_counter() - stack.pop())
+
+    return engine
+
+
+def init_app(app):
+    if not PROFILING_ENABLED:
+        return
+
+    @app.before_request
+    def start_profile():
+        mode = request.headers.get('X-Profile')
+        if not mode and random.random() >= PROFILE_SAMPLE_RATE:
+            return
+        profile = RequestProfile(f"{request.method} {request.path}", use_cprofile=(mode == 'cprofile'))
+        g.profile_token = _current.set(profile)
+        g.profile = profile
+        profile.start()
+
+    @app.after_request
+    def add_profile_headers(response):
+        profile = g.pop('profile', None)
+        if profile is None:
+            return response
+        profile.stop()
+        recent_profiles.append(profile)
+
+        response.headers['X-Profile-Id'] = profile.id
+        for kind, (count, total) in profile.round_trips.items():
+            response.headers[f'X-Profile-{kind.capitalize()}-Count'] = str(count)
+            response.headers[f'X-Profile-{kind.capitalize()}-Time-Ms'] = f"{total * 1000:.3f}"
+
+        if PROFILE_MAX_ROUND_TRIPS and profile.count() > PROFILE_MAX_ROUND_TRIPS:
+            response.headers['X-Profile-Budget-Exceeded'] = str(profile.count())
+            logger.warning("⚠️ Round-trip budget exceeded", extra={
+                'profile_id': profile.id, 'endpoint': profile.name, 'round_trips': profile.count()
+            })
+        return response
+
+    @app.teardown_request
+    def reset_profile(exc):
+        token = g.pop('profile_token', None)
+        if token is not None:
+            _current.reset(token)
+
+    @app.route('/debug/profiles', methods=['GET'])
+    def list_profiles():
+        return jsonify([p.summary() for p in reversed(recent_profiles)])
+
+    @app.route('/debug/profiles/<profile_id>', methods=['GET'])
+    def get_profile(profile_id):
+        for profile in recent_profiles:
+            if profile.id == profile_id:
+                return jsonify({**profile.summary(), 'cprofile': profile.stats})
+        return jsonify({'error': 'Profile not found'}), 404
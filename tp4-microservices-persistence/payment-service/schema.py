@@ -0,0 +1,27 @@
+"""
+Gestion du schéma PostgreSQL, séparée du service HTTP
+
+Le DDL s'exécute une seule fois avant le démarrage des workers gunicorn,
+au lieu d'être rejoué à l'import de app.py dans chaque worker.
+
+Usage : python schema.py
+"""
+
+import logging
+from logging_setup import configure_logging
+from config import Base, registry
+import models.payment  # noqa: F401 - enregistre les tables dans Base.metadata
+
+logger = logging.getLogger(__name__)
+
+
+def create_schema():
+    Base.metadata.create_all(bind=registry.get('engine'))
+    logger.info("✅ Payment schema ready")
+
+
+if __name__ == '__main__':
+    configure_logging()
+    create_schema()
+    # Ne pas laisser de connexions ouvertes avant le fork des workers
+    registry.reset()
@@ -0,0 +1,88 @@
+from models.payment import Payment
+from config import AsyncSessionLocal
+import uuid
+import logging
+from datetime import datetime
+import json
+
+class AsyncPaymentService:
+    """
+    Version asynchrone de PaymentService pour le mode ASGI (asgi.py)
+    Même modèle Payment, même cache-aside, sessions AsyncSession (asyncpg)
+    """
+    
+    def __init__(self):
+        self.logger = logging.getLogger(__name__)
+    
+    async def create_payment(self, payment_data):
+        """Crée un nouveau paiement avec mise en cache automatique"""
+        async with AsyncSessionLocal() as db:
+            try:
+                payment = Payment(
+                    reservation_id=payment_data['reservation_id'],
+                    user_id=payment_data['user_id'],
+                    amount=payment_data['amount'],
+                    currency=payment_data.get('currency', 'XOF'),
+                    payment_method=payment_data['payment_method'],
+                    transaction_id=str(uuid.uuid4()),
+                    e_metadata=json.dumps(payment_data.get('metadata', {}))
+                )
+                
+                db.add(payment)
+                await db.commit()
+                await db.refresh(payment)
+                
+                await payment.cache_payment_data_async()
+                
+                self.logger.info("✅ Payment created: %s", payment.id)
+                return payment
+                
+            except Exception as e:
+                await db.rollback()
+                self.logger.error("❌ Failed to create payment: %s", e)
+                raise e
+    
+    async def get_payment_by_id(self, payment_id: int):
+        """Récupère un paiement avec cache-aside pattern"""
+        async with AsyncSessionLocal() as db:
+            try:
+                payment = await Payment.get_payment_with_cache_async(payment_id, db)
+                if not payment:
+                    self.logger.warning("❌ Payment %s not found", payment_id)
+                return payment
+                
+            except Exception as e:
+                self.logger.error("❌ Failed to get payment %s: %s", payment_id, e)
+                raise e
+    
+    async def update_payment_status(self, payment_id: int, status: str, metadata: dict = None):
+        """Met à jour le statut d'un paiement et rafraîchit le cache"""
+        async with AsyncSessionLocal() as db:
+            try:
+                payment = await db.get(Payment, payment_id)
+                if not payment:
+                    raise ValueError(f"Payment {payment_id} not found")
+                
+                payment.status = status
+                if metadata:
+                    existing_metadata = json.loads(payment.e_metadata) if payment.e_metadata else {}
+                    existing_metadata.update(metadata)
+                    payment.e_metadata = json.dumps(existing_metadata)
+                
+                if status == 'completed':
+                    payment.completed_at = datetime.now()
+                
+                await db.commit()
+                await db.refresh(payment)
+                
+                await payment.cache_payment_data_async()
+                
+                self.logger.info("✅ Payment %s status updated to %s", payment_id, status)
+                return payment
+                
+            except Exception as e:
+                await db.rollback()
+                self.logger.error("❌ Failed to update payment %s: %s", payment_id, e)
+                raise e
+
+async_payment_service = AsyncPaymentService()
@@ -0,0 +1,186 @@
+"""
+Scanner de cohérence cache Redis / PostgreSQL pour les paiements
+
+update_payment_status écrit en base puis dans le cache, et la compensation
+change le statut sans toucher au cache : un crash entre les deux laisse une
+entrée obsolète jusqu'à expiration du TTL. Ce scanner parcourt l'espace
+payment:* par lots (SCAN + MGET), compare en bloc avec PostgreSQL (IN) et
+répare ou évince les divergences, en limitant son débit.
+
+En arrière-plan, chaque worker gunicorn lance la boucle mais un verrou Redis
+désigne un seul scanner par intervalle ; le dernier rapport est publié dans
+Redis pour que /health l'affiche quel que soit le worker qui répond.
+
+Usage CLI (depuis payment-service/) :
+    python -m services.cache_consistency_service --mode repair --batch-size 200
+"""
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from models.payment import Payment
+from config import SessionLocal, cache_manager
+import argparse
+import json
+import logging
+from logging_setup import configure_logging
+import threading
+import time
+
+LAST_REPORT_KEY = 'cache-consistency:last-report'
+
+class CacheConsistencyService:
+
+    def __init__(self, cache=cache_manager, session_factory=SessionLocal):
+        self.logger = logging.getLogger(__name__)
+        self.cache = cache
+        self.session_factory = session_factory
+        self.last_report = None
+
+    def scan(self, mode='repair', batch_size=200, max_keys_per_second=1000, ttl_seconds=None):
+        """
+        Parcourt payment:* et corrige les entrées divergentes.
+
+        mode='repair' réécrit l'entrée depuis PostgreSQL, mode='evict' la supprime
+        (le prochain get_payment_with_cache la rechargera). Les entrées sans
+        paiement correspondant en base sont toujours évincées. En mode repair,
+        une entrée modifiée entre la lecture et la réécriture est évincée.
+
+        Une session courte par lot : aucune connexion n'est retenue pendant
+        les pauses de limitation de débit.
+        """
+        if mode not in ('repair', 'evict'):
+            raise ValueError(f"Unknown scan mode: {mode}")
+
+        ttl_seconds = ttl_seconds or self.cache.default_ttl
+        report = {
+            'mode': mode, 'scanned': 0, 'consistent': 0, 'stale': 0,
+            'orphaned': 0, 'invalid': 0, 'repaired': 0, 'evicted': 0, 'aborted': False
+        }
+        started = time.monotonic()
+        cursor = 0
+        try:
+            while True:
+                batch_started = time.monotonic()
+                cursor, keys = self.cache.scan(cursor, match=Payment.cache_key('*'), count=batch_size)
+                if keys:
+                    db: Session = self.session_factory()
+                    try:
+                        self._check_batch(db, keys, mode, ttl_seconds, report)
+                    finally:
+                        db.close()
+                    # Limitation de débit : rester à l'écart du chemin critique
+                    min_duration = len(keys) / max_keys_per_second
+                    elapsed = time.monotonic() - batch_started
+                    if elapsed < min_duration:
+                        time.sleep(min_duration - elapsed)
+
+                if self.cache.breaker.state == 'open':
+                    report['aborted'] = True
+                    self.logger.warning("⚠️ Cache consistency scan aborted: Redis circuit open")
+                    break
+                if int(cursor) == 0:
+                    break
+
+            report['elapsed_seconds'] = round(time.monotonic() - started, 3)
+            self.last_report = report
+            self.cache.set(LAST_REPORT_KEY, json.dumps(report))
+            log = self.logger.warning if report['stale'] or report['orphaned'] else self.logger.info
+            log("🔎 Cache consistency scan", extra=report)
+            return report
+
+        except Exception as e:
+            self.logger.error("❌ Cache consistency scan failed: %s", e)
+            raise e
+
+    def _check_batch(self, db, keys, mode, ttl_seconds, report):
+        cached_values = self.cache.get_many(keys)
+        cached = {}
+        to_evict = []
+        for key, value in zip(keys, cached_values):
+            if value is None:
+                continue  # Expirée entre SCAN et MGET
+            try:
+                cached[int(key.split(':', 1)[1])] = (key, value, json.loads(value))
+            except (ValueError, json.JSONDecodeError):
+                report['invalid'] += 1
+                to_evict.append(key)
+        report['scanned'] += len(keys)
+
+        payments = {}
+        if cached:
+            rows = db.scalars(select(Payment).where(Payment.id.in_(list(cached.keys()))))
+            payments = {p.id: p for p in rows}
+
+        to_repair = []
+        for payment_id, (key, value, data) in cached.items():
+            payment = payments.get(payment_id)
+            if payment is None:
+                report['orphaned'] += 1
+                to_evict.append(key)
+                continue
+
+            fresh = payment.to_cache_value()
+            if json.loads(fresh) == data:
+                report['consistent'] += 1
+                continue
+
+            report['stale'] += 1
+            if mode == 'repair':
+                to_repair.append((key, value, fresh, ttl_seconds))
+            else:
+                to_evict.append(key)
+
+        if to_repair:
+            # Réécriture conditionnelle : si une mise à jour de statut a touché une
+            # de ces clés depuis le MGET, la valeur lue en base peut être plus
+            # ancienne que le cache ; on évince le lot plutôt que de l'écraser
+            if self.cache.compare_and_set_many(to_repair):
+                report['repaired'] += len(to_repair)
+            else:
+                to_evict.extend(key for key, _, _, _ in to_repair)
+        if to_evict and self.cache.delete(*to_evict):
+            report['evicted'] += len(to_evict)
+
+    def latest_report(self):
+        """Dernier rapport publié, quel que soit le worker qui a exécuté le scan"""
+        value = self.cache.get(LAST_REPORT_KEY)
+        if value is None:
+            return self.last_report
+        try:
+            return json.loads(value)
+        except json.JSONDecodeError:
+            return self.last_report
+
+    def start_background(self, interval_seconds, **scan_options):
+        """
+        Lance le scan périodiquement dans un thread démon. Le verrou Redis
+        (valable un intervalle) élit un seul scanner parmi les workers.
+        """
+        def run():
+            while True:
+                time.sleep(interval_seconds)
+                if not self.cache.try_lock('cache-consistency-scan', interval_seconds):
+                    continue
+                try:
+                    self.scan(**scan_options)
+                except Exception:
+                    pass  # Déjà journalisé ; on réessaie au prochain intervalle
+
+        thread = threading.Thread(target=run, name='cache-consistency-scan', daemon=True)
+        thread.start()
+        return thread
+
+cache_consistency_service = CacheConsistencyService()
+
+if __name__ == '__main__':
+    configure_logging()
+    parser = argparse.ArgumentParser(description='Vérifie la cohérence cache Redis / PostgreSQL')
+    parser.add_argument('--mode', choices=['repair', 'evict'], default='repair')
+    parser.add_argument('--batch-size', type=int, default=200, help='COUNT du SCAN et taille du IN')
+    parser.add_argument('--max-keys-per-second', type=int, default=1000, help='Débit maximal du scan')
+    args = parser.parse_args()
+    cache_consistency_service.scan(
+        mode=args.mode,
+        batch_size=args.batch_size,
+        max_keys_per_second=args.max_keys_per_second
+    )
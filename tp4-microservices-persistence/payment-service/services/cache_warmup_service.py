@@ -0,0 +1,110 @@
+"""
+Préchauffage du cache Redis après un redémarrage / flush
+
+Sans préchauffage, tout le trafic retombe sur PostgreSQL jusqu'à ce que
+cache_payment_data repeuple le cache, précisément quand la saga réessaie.
+
+Usage CLI (depuis payment-service/) :
+    python -m services.cache_warmup_service --hours 24 --chunk-size 500
+"""
+
+from sqlalchemy import select, or_
+from sqlalchemy.orm import Session
+from models.payment import Payment, NON_TERMINAL_STATUSES
+from config import SessionLocal, cache_manager
+from datetime import datetime, timedelta
+import argparse
+import logging
+from logging_setup import configure_logging
+import random
+import time
+
+class CacheWarmupService:
+
+    def __init__(self, cache=cache_manager, session_factory=SessionLocal):
+        self.logger = logging.getLogger(__name__)
+        self.cache = cache
+        self.session_factory = session_factory
+
+    def warm_up(self, hours=24, chunk_size=500, ttl_seconds=None, ttl_jitter=600, progress=None):
+        """
+        Charge les paiements récents et non terminés dans Redis.
+
+        - Curseur côté serveur (yield_per) : la mémoire reste bornée à un lot
+        - Un pipeline Redis par lot : un aller-retour au lieu d'un par paiement
+        - TTL étalés (ttl_seconds + [0, ttl_jitter]) pour éviter une expiration simultanée
+        - SET NX : une entrée déjà présente (plus récente que la lecture) est conservée ;
+          loaded compte les entrées écrites, skipped celles déjà en cache
+        """
+        ttl_seconds = ttl_seconds or self.cache.default_ttl
+        since = datetime.now() - timedelta(hours=hours)
+        stmt = (
+            select(Payment)
+            .where(or_(Payment.created_at >= since, Payment.status.in_(NON_TERMINAL_STATUSES)))
+            .order_by(Payment.id)
+            .execution_options(yield_per=chunk_size)
+        )
+
+        stats = {'loaded': 0, 'skipped': 0, 'chunks': 0, 'failed_chunks': 0, 'aborted': False}
+        started = time.monotonic()
+        db: Session = self.session_factory()
+        try:
+            for chunk in db.scalars(stmt).partitions():
+                entries = [
+                    (Payment.cache_key(p.id), p.to_cache_value(), ttl_seconds + random.randint(0, ttl_jitter))
+                    for p in chunk
+                ]
+                stats['chunks'] += 1
+                written = self.cache.set_many(entries, nx=True)
+                if written is not None:
+                    stats['loaded'] += written
+                    stats['skipped'] += len(entries) - written
+                else:
+                    stats['failed_chunks'] += 1
+                    if self.cache.breaker.state == 'open':
+                        # Redis indisponible : inutile de continuer à lire la base
+                        stats['aborted'] = True
+                        self.logger.warning("⚠️ Cache warm-up aborted: Redis circuit open")
+                        break
+
+                stats['elapsed_seconds'] = round(time.monotonic() - started, 3)
+                self.logger.info("🔥 Cache warm-up progress", extra=stats)
+                if progress:
+                    progress(stats)
+
+            stats['elapsed_seconds'] = round(time.monotonic() - started, 3)
+            self.logger.info("✅ Cache warm-up done", extra=stats)
+            return stats
+
+        except Exception as e:
+            self.logger.error("❌ Cache warm-up failed: %s", e)
+            raise e
+        finally:
+            db.close()
+
+    def warm_up_once(self, lock_ttl=600, **options):
+        """
+        Préchauffage au démarrage : chaque worker gunicorn l'appelle, mais seul
+        le détenteur du verrou Redis (valable lock_ttl secondes) l'exécute.
+        """
+        if not self.cache.try_lock('cache-warmup', lock_ttl):
+            self.logger.info("Cache warm-up skipped: already running or done elsewhere")
+            return None
+        return self.warm_up(**options)
+
+cache_warmup_service = CacheWarmupService()
+
+if __name__ == '__main__':
+    configure_logging()
+    parser = argparse.ArgumentParser(description='Préchauffe le cache Redis des paiements')
+    parser.add_argument('--hours', type=int, default=24, help='Fenêtre des paiements récents')
+    parser.add_argument('--chunk-size', type=int, default=500, help='Taille des lots (yield_per / pipeline)')
+    parser.add_argument('--ttl', type=int, default=None, help='TTL de base en secondes (PAYMENT_CACHE_TTL)')
+    parser.add_argument('--ttl-jitter', type=int, default=600, help='Étalement maximal du TTL en secondes')
+    args = parser.parse_args()
+    cache_warmup_service.warm_up(
+        hours=args.hours,
+        chunk_size=args.chunk_size,
+        ttl_seconds=args.ttl,
+        ttl_jitter=args.ttl_jitter
+    )
@@ -26,7 +26,7 @@ class PaymentService:
                 currency=payment_data.get('currency', 'XOF'),
                 payment_method=payment_data['payment_method'],
                 transaction_id=str(uuid.uuid4()),
-                metadata=json.dumps(payment_data.get('metadata', {}))
+                e_metadata=json.dumps(payment_data.get('metadata', {}))
             )
             
             db.add(payment)
@@ -36,12 +36,12 @@ class PaymentService:
             # Mettre en cache automatiquement
             payment.cache_payment_data()
             
-            self.logger.info(f"✅ Payment created: {payment.id}")
+            self.logger.info("✅ Payment created: %s", payment.id)
             return payment
             
         except Exception as e:
             db.rollback()
-            self.logger.error(f"❌ Failed to create payment: {e}")
+            self.logger.error("❌ Failed to create payment: %s", e)
             raise e
         finally:
             db.close()
@@ -53,21 +53,36 @@ class PaymentService:
             # Utiliser la méthode avec cache
             cached_payment = Payment.get_payment_with_cache(payment_id, db)
             if cached_payment:
-                self.logger.info(f"🎯 Payment {payment_id} found (cache hit)")
+                self.logger.info("🎯 Payment %s found (cache hit)", payment_id)
                 return cached_payment
                 
             # Fallback direct si le cache échoue
             payment = db.query(Payment).filter(Payment.id == payment_id).first()
             if payment:
                 payment.cache_payment_data()
-                self.logger.info(f"💾 Payment {payment_id} found (database)")
+                self.logger.info("💾 Payment %s found (database)", payment_id)
                 return payment.to_dict()
             
-            self.logger.warning(f"❌ Payment {payment_id} not found")
+            self.logger.warning("❌ Payment %s not found", payment_id)
             return None
             
         except Exception as e:
-            self.logger.error(f"❌ Failed to get payment {payment_id}: {e}")
+            self.logger.error("❌ Failed to get payment %s: %s", payment_id, e)
+            raise e
+        finally:
+            db.close()
+    
+    def get_payment_json(self, payment_id: int):
+        """Récupère un paiement déjà encodé en JSON (pas de decode/re-encode sur cache hit)"""
+        db: Session = SessionLocal()
+        try:
+            payment_json = Payment.get_payment_json_with_cache(payment_id, db)
+            if not payment_json:
+                self.logger.warning("❌ Payment %s not found", payment_id)
+            return payment_json
+            
+        except Exception as e:
+            self.logger.error("❌ Failed to get payment %s: %s", payment_id, e)
             raise e
         finally:
             db.close()
@@ -82,9 +97,9 @@ class PaymentService:
             
             payment.status = status
             if metadata:
-                existing_metadata = json.loads(payment.metadata) if payment.metadata else {}
+                existing_metadata = json.loads(payment.e_metadata) if payment.e_metadata else {}
                 existing_metadata.update(metadata)
-                payment.metadata = json.dumps(existing_metadata)
+                payment.e_metadata = json.dumps(existing_metadata)
             
             if status == 'completed':
                 payment.completed_at = datetime.now()
@@ -95,12 +110,12 @@ class PaymentService:
             # Mettre à jour le cache
             payment.cache_payment_data()
             
-            self.logger.info(f"✅ Payment {payment_id} status updated to {status}")
+            self.logger.info("✅ Payment %s status updated to %s", payment_id, status)
             return payment
             
         except Exception as e:
             db.rollback()
-            self.logger.error(f"❌ Failed to update payment {payment_id}: {e}")
+            self.logger.error("❌ Failed to update payment %s: %s", payment_id, e)
             raise e
         finally:
             db.close()
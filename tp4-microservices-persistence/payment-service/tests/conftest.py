@@ -0,0 +1,9 @@
+import os
+import sys
+import tempfile
+
+# Les modules du service s'importent depuis la racine de payment-service
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Substitut local de PostgreSQL : à définir avant l'import de config
+os.environ.setdefault('POSTGRES_URL', f"sqlite:///{os.path.join(tempfile.gettempdir(), 'payment_tests.db')}")
+os.environ.pop('PROMETHEUS_MULTIPROC_DIR', None)
@@ -0,0 +1,44 @@
+import pytest
+
+fakeredis = pytest.importorskip('fakeredis')
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from config import Base, CacheManager
+from models.payment import Payment
+from services.cache_warmup_service import CacheWarmupService
+
+
+@pytest.fixture
+def service(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'warmup.db'}")
+    Base.metadata.create_all(bind=engine)
+    session_factory = sessionmaker(bind=engine)
+    with session_factory() as db:
+        db.add_all(
+            Payment(reservation_id=f'res-{i}', user_id='user-1', amount=1000, payment_method='card',
+                    transaction_id=f'tx-{i}')
+            for i in range(10)
+        )
+        db.commit()
+    cache = CacheManager(fakeredis.FakeRedis(decode_responses=True))
+    yield CacheWarmupService(cache=cache, session_factory=session_factory)
+    engine.dispose()
+
+
+def test_cold_cache_loads_every_payment(service):
+    stats = service.warm_up(chunk_size=4)
+
+    assert (stats['loaded'], stats['skipped'], stats['chunks']) == (10, 0, 3)
+
+
+def test_warm_cache_reports_skipped_entries_and_keeps_them(service):
+    service.warm_up()
+    service.cache.redis.set(Payment.cache_key(3), 'fresh')
+    service.cache.redis.delete(Payment.cache_key(5))
+
+    stats = service.warm_up()
+
+    assert (stats['loaded'], stats['skipped']) == (1, 9)
+    assert service.cache.redis.get(Payment.cache_key(3)) == 'fresh'
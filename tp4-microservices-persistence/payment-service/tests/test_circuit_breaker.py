@@ -0,0 +1,164 @@
+import asyncio
+
+import pytest
+import redis
+
+from circuit_breaker import CircuitBreaker
+from config import AsyncCacheManager, CacheManager
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def breaker(clock):
+    return CircuitBreaker('test', failure_threshold=3, recovery_timeout=10.0, clock=clock)
+
+
+def open_breaker(breaker):
+    for _ in range(breaker.failure_threshold):
+        assert breaker.allow_request()
+        breaker.record_failure()
+
+
+def test_opens_after_threshold(breaker):
+    for _ in range(breaker.failure_threshold - 1):
+        breaker.allow_request()
+        breaker.record_failure()
+    assert breaker.state == 'closed'
+
+    breaker.allow_request()
+    breaker.record_failure()
+    assert breaker.state == 'open'
+    assert not breaker.allow_request()
+    assert breaker.metrics()['short_circuited'] == 1
+
+
+def test_success_resets_consecutive_failures(breaker):
+    for _ in range(breaker.failure_threshold - 1):
+        breaker.allow_request()
+        breaker.record_failure()
+    breaker.allow_request()
+    breaker.record_success()
+
+    breaker.allow_request()
+    breaker.record_failure()
+    assert breaker.state == 'closed'
+
+
+def test_half_open_allows_a_single_probe(breaker, clock):
+    open_breaker(breaker)
+    clock.advance(10.0)
+    assert breaker.state == 'half_open'
+
+    assert breaker.allow_request()
+    assert not breaker.allow_request()
+
+
+def test_probe_success_closes(breaker, clock):
+    open_breaker(breaker)
+    clock.advance(10.0)
+    assert breaker.allow_request()
+    breaker.record_success()
+
+    assert breaker.state == 'closed'
+    assert breaker.metrics()['transitions'] == {
+        'closed->open': 1, 'open->half_open': 1, 'half_open->closed': 1
+    }
+
+
+def test_probe_failure_reopens_for_a_full_timeout(breaker, clock):
+    open_breaker(breaker)
+    clock.advance(10.0)
+    assert breaker.allow_request()
+    breaker.record_failure()
+
+    assert breaker.state == 'open'
+    clock.advance(9.0)
+    assert not breaker.allow_request()
+    clock.advance(1.0)
+    assert breaker.allow_request()
+
+
+def test_listener_receives_transitions(clock):
+    seen = []
+    breaker = CircuitBreaker('test', failure_threshold=1, recovery_timeout=1.0, clock=clock,
+                             listener=lambda old, new, value: seen.append((old, new, value)))
+    breaker.allow_request()
+    breaker.record_failure()
+    clock.advance(1.0)
+    breaker.allow_request()
+    breaker.record_success()
+
+    assert seen == [('closed', 'open', 2), ('open', 'half_open', 1), ('half_open', 'closed', 0)]
+
+
+class FailingRedis:
+    def __init__(self, exc):
+        self.exc = exc
+
+    def get(self, key):
+        raise self.exc
+
+
+class FailingAsyncRedis(FailingRedis):
+    async def get(self, key):
+        raise self.exc
+
+
+def test_redis_error_probe_returns_default_and_reopens(breaker, clock):
+    cache = CacheManager(FailingRedis(redis.ConnectionError('down')), breaker=breaker)
+    open_breaker(breaker)
+    clock.advance(10.0)
+
+    assert cache.get('payment:1') is None
+    assert breaker.state == 'open'
+
+
+def test_unexpected_error_releases_probe(breaker, clock):
+    cache = CacheManager(FailingRedis(UnicodeDecodeError('utf-8', b'\xff', 0, 1, 'invalid')), breaker=breaker)
+    open_breaker(breaker)
+    clock.advance(10.0)
+
+    with pytest.raises(UnicodeDecodeError):
+        cache.get('payment:1')
+    assert breaker.state == 'open'
+    clock.advance(10.0)
+    assert breaker.allow_request()
+
+
+def test_cancelled_async_probe_releases_probe_without_failure(breaker, clock):
+    cache = AsyncCacheManager(FailingAsyncRedis(asyncio.CancelledError()), breaker=breaker)
+    open_breaker(breaker)
+    clock.advance(10.0)
+
+    with pytest.raises(asyncio.CancelledError):
+        asyncio.run(cache.get('payment:1'))
+    assert breaker.metrics()['failures'] == breaker.failure_threshold
+    assert breaker.state == 'half_open'
+    assert breaker.allow_request()
+
+
+def test_cancelled_calls_do_not_open_closed_breaker(breaker):
+    cache = AsyncCacheManager(FailingAsyncRedis(asyncio.CancelledError()), breaker=breaker)
+
+    for _ in range(breaker.failure_threshold * 2):
+        with pytest.raises(asyncio.CancelledError):
+            asyncio.run(cache.get('payment:1'))
+    metrics = breaker.metrics()
+    assert metrics['state'] == 'closed'
+    assert metrics['failures'] == 0
+    assert metrics['consecutive_failures'] == 0
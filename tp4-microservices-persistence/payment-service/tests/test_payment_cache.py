@@ -0,0 +1,44 @@
+import json
+from datetime import datetime
+
+import pytest
+
+import models.payment
+from models.payment import Payment
+
+
+def make_payment(payment_id):
+    return Payment(
+        id=payment_id, reservation_id='res-1', user_id='user-1', amount=15000, currency='XOF',
+        payment_method='card', status='pending', transaction_id='tx-1', created_at=datetime(2026, 1, 1)
+    )
+
+
+@pytest.mark.parametrize('payment_id', [1, 12, 123456])
+def test_cache_value_passes_its_own_check(payment_id):
+    assert Payment.is_valid_cache_value(payment_id, make_payment(payment_id).to_cache_value())
+
+
+def test_cache_value_keeps_id_first():
+    assert make_payment(7).to_cache_value().startswith('{"id": 7,')
+
+
+@pytest.mark.parametrize('value', [
+    '',
+    'not json',
+    '{"id": 12, "status": "pen',         # tronquée
+    '{"id": 12, "status": "pending"}',   # autre paiement (préfixe commun)
+    '{"id": 1',
+])
+def test_invalid_cache_values_are_rejected(value):
+    assert not Payment.is_valid_cache_value(1, value)
+
+
+def test_check_follows_encoder_format(monkeypatch):
+    monkeypatch.setattr(
+        models.payment, '_encode_cache_value',
+        lambda data: json.dumps(data, default=str, separators=(',', ':'))
+    )
+    value = make_payment(42).to_cache_value()
+    assert value.startswith('{"id":42,')
+    assert Payment.is_valid_cache_value(42, value)
@@ -0,0 +1,71 @@
+"""
+Budget d'allers-retours SQL / Redis des chemins cache-aside
+
+Compte les appels via profiling.capture() : une régression (requête en plus,
+cache contourné...) fait échouer le test au lieu de seulement ralentir le
+benchmark.
+
+Usage (depuis payment-service/) :
+    pip install -r tests/requirements.txt
+    python -m pytest -q tests
+"""
+
+import pytest
+
+fakeredis = pytest.importorskip('fakeredis')
+
+import profiling
+from config import Base, registry
+from models.payment import Payment
+
+
+@pytest.fixture(scope='module')
+def client():
+    server = fakeredis.FakeServer()
+    registry.register('redis', lambda: fakeredis.FakeRedis(server=server, decode_responses=True))
+    registry.reset()
+    engine = registry.get('engine')
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+    from app import app
+    yield app.test_client()
+    registry.reset()
+
+
+@pytest.fixture
+def payment_id(client):
+    response = client.post('/api/payments', json={
+        'reservation_id': 'res-1', 'user_id': 'user-1', 'amount': 15000, 'payment_method': 'card'
+    })
+    return response.get_json()['payment']['id']
+
+
+def round_trips(name, call):
+    with profiling.capture(name) as profile:
+        response = call()
+    assert response.status_code < 400
+    return profile.count('sql'), profile.count('redis')
+
+
+def test_create(client):
+    counts = round_trips('create', lambda: client.post('/api/payments', json={
+        'reservation_id': 'res-2', 'user_id': 'user-2', 'amount': 15000, 'payment_method': 'card'
+    }))
+    assert counts == (2, 1)  # INSERT + rechargement ; SETEX
+
+
+def test_get_hit(client, payment_id):
+    client.get(f'/api/payments/{payment_id}')
+    assert round_trips('get_hit', lambda: client.get(f'/api/payments/{payment_id}')) == (0, 1)  # GET
+
+
+def test_get_miss(client, payment_id):
+    registry.get('redis').delete(Payment.cache_key(payment_id))
+    assert round_trips('get_miss', lambda: client.get(f'/api/payments/{payment_id}')) == (1, 2)  # SELECT ; GET + SETEX
+
+
+def test_invalid_cache_entry_falls_back_to_database(client, payment_id):
+    registry.get('redis').set(Payment.cache_key(payment_id), '{"id": %d, "status": "pen' % payment_id)
+    assert round_trips('get_invalid', lambda: client.get(f'/api/payments/{payment_id}')) == (1, 2)
+    assert client.get(f'/api/payments/{payment_id}').get_json()['id'] == payment_id